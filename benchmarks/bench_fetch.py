@@ -0,0 +1,59 @@
+"""
+Fetch throughput vs. concurrency against the local mock partsearch server.
+
+Example:
+    python benchmarks/bench_fetch.py --parts 400 --latency 0.05
+"""
+import argparse
+import os
+import sys
+import time
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fetch_engine import FetchEngine
+from key_pool import KeyPool
+from oem_client import OEMSecretsClient
+from mock_oemsecrets import start_mock_server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--parts", type=int, default=400)
+    parser.add_argument("--latency", type=float, default=0.05, help="mock latency in seconds")
+    parser.add_argument("--concurrency", default="1,2,4,8,16,32")
+    parser.add_argument("--rate-per-key", type=float, default=0, help="0 disables the limit")
+    parser.add_argument("--keys", type=int, default=2)
+    parser.add_argument("--exhausted-keys", type=int, default=1,
+                        help="how many of the keys answer 401 (exercises key rotation)")
+    args = parser.parse_args()
+
+    api_keys = [f"key{i}" for i in range(args.keys)]
+    server, base_url = start_mock_server(
+        latency=args.latency, exhausted_keys=api_keys[:args.exhausted_keys]
+    )
+    part_numbers = [f"PN-{i:06d}" for i in range(args.parts)]
+
+    print(f"{'concurrency':>11} {'seconds':>9} {'parts/s':>9} {'requests':>9} {'ok':>6} {'p50 ms':>7} {'p95 ms':>7}")
+    for concurrency in [int(c) for c in args.concurrency.split(",")]:
+        client = OEMSecretsClient(api_base_url=base_url, pool_size=concurrency)
+        key_pool = KeyPool(api_keys, rate_per_key=args.rate_per_key)
+        fetcher = FetchEngine(key_pool, concurrency=concurrency, client=client)
+        server.request_count = 0
+        start = time.perf_counter()
+        # The key pool prints a line when a key is retired; keep the table readable
+        with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+            ok = sum(1 for _, info in fetcher.fetch_all(part_numbers) if info)
+        elapsed = time.perf_counter() - start
+        stats = client.stats.summary()
+        client.close()
+        print(f"{concurrency:>11} {elapsed:>9.2f} {args.parts / elapsed:>9.1f} "
+              f"{server.request_count:>9} {ok:>6} "
+              f"{stats['p50_seconds'] * 1000:>7.1f} {stats['p95_seconds'] * 1000:>7.1f}")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
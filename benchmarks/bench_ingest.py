@@ -0,0 +1,137 @@
+"""
+End-to-end ingest benchmark: generated catalog -> mock API -> database.
+
+Generates a catalog, starts the mock partsearch server (latency, 429/5xx
+rates, per-key quotas) and runs final_dev.pull_and_insert_data() against a
+throw-away SQLite file or a local MySQL (--url). Prints the per-stage
+report of the run; --save keeps it as a baseline and --baseline compares a
+later run against it, exiting with 1 when a stage's rows/s dropped by more
+than --tolerance.
+
+Example:
+    python benchmarks/bench_ingest.py --parts 5000 --save baseline.json
+    python benchmarks/bench_ingest.py --parts 5000 --baseline baseline.json
+"""
+import argparse
+import glob
+import io
+import json
+import os
+import sys
+import tempfile
+from contextlib import redirect_stdout
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from make_catalog import make_catalog, write_catalog
+from mock_oemsecrets import start_mock_server
+
+# Stages whose throughput is compared against a baseline
+COMPARED_STAGES = ["fetch", "flatten", "clean", "clean_manufacturers", "clean_lead_time", "load"]
+
+
+def run_ingest(env):
+    """
+    Runs one pull_and_insert_data() with `env` applied and returns its report.
+    """
+    os.environ.update(env)
+    import final_dev
+
+    output = io.StringIO()
+    with redirect_stdout(output):
+        final_dev.pull_and_insert_data()
+    if "Error pulling/inserting" in output.getvalue():
+        print(output.getvalue())
+    reports = sorted(glob.glob(os.path.join(env["METRICS_DIR"], "run-*.json")))
+    with open(reports[-1], "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare(report, baseline, tolerance):
+    """
+    Returns the stages that are more than `tolerance` slower than the baseline.
+    """
+    regressions = []
+    for stage in COMPARED_STAGES:
+        now = report["stages"].get(stage, {}).get("rows_per_second", 0.0)
+        before = baseline["stages"].get(stage, {}).get("rows_per_second", 0.0)
+        if before and now < before * (1 - tolerance):
+            regressions.append((stage, before, now))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--parts", type=int, default=2000)
+    parser.add_argument("--catalog-format", default="xlsx", choices=["xlsx", "csv", "parquet"])
+    parser.add_argument("--url", default="", help="database URL (default: a temp SQLite file)")
+    parser.add_argument("--latency", type=float, default=0.005, help="mock latency in seconds")
+    parser.add_argument("--rate-429", type=float, default=0.01)
+    parser.add_argument("--rate-5xx", type=float, default=0.01)
+    parser.add_argument("--empty-rate", type=float, default=0.05)
+    parser.add_argument("--keys", type=int, default=3)
+    parser.add_argument("--key-quota", type=int, default=0, help="calls per key before 401 (0 = unlimited)")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--batch-size", type=int, default=50000)
+    parser.add_argument("--load-method", default="executemany")
+    parser.add_argument("--snapshot-mode", default="full")
+    parser.add_argument("--save", default="", help="write the report to this file")
+    parser.add_argument("--baseline", default="", help="report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="bench_ingest_")
+    catalog_path = os.path.join(work_dir, f"catalog.{args.catalog_format}")
+    write_catalog(make_catalog(args.parts), catalog_path)
+
+    server, base_url = start_mock_server(
+        latency=args.latency, rate_429=args.rate_429, rate_5xx=args.rate_5xx,
+        empty_rate=args.empty_rate, key_quota=args.key_quota,
+    )
+    env = {
+        "CATALOG_PATH": catalog_path,
+        "CATALOG_CACHE_DIR": os.path.join(work_dir, "catalog_cache"),
+        "DATABASE_URL": args.url or f"sqlite:///{os.path.join(work_dir, 'bench.db')}",
+        "OEM_API_BASE_URL": base_url,
+        "API_KEYS": ",".join(f"bench-key-{i}" for i in range(args.keys)),
+        "API_KEY_RATE_LIMIT": "0",
+        "API_BACKOFF_BASE": "0.01",
+        "FETCH_CONCURRENCY": str(args.concurrency),
+        "KEY_STATE_PATH": os.path.join(work_dir, "key_state.json"),
+        "RESPONSE_CACHE_DIR": "",
+        "MANUFACTURER_ALIASES_PATH": os.path.join(ROOT, "manufacturer_aliases.json"),
+        "BATCH_SIZE": str(args.batch_size),
+        "LOAD_METHOD": args.load_method,
+        "SNAPSHOT_MODE": args.snapshot_mode,
+        "METRICS_DIR": os.path.join(work_dir, "metrics"),
+        "METRICS_PORT": "0",
+        "PARQUET_EXPORT_DIR": "",
+    }
+    report = run_ingest(env)
+    server.shutdown()
+
+    print(f"{args.parts:,} parts in {report['total_seconds']:.1f} s, peak RSS {report['peak_rss_mb']} MB")
+    print(f"mock answers: {dict(sorted(server.status_counts.items()))}")
+    print(f"api: {report.get('api')}")
+    print(f"keys: {report.get('api_keys')}")
+    print(f"{'stage':<22} {'seconds':>9} {'rows':>10} {'rows/s':>12}")
+    for stage, values in report["stages"].items():
+        print(f"{stage:<22} {values['seconds']:>9.3f} {values['rows']:>10,} {values['rows_per_second']:>12,.1f}")
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report saved to {args.save}")
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for stage, before, now in regressions:
+            print(f"REGRESSION {stage}: {before:,.1f} -> {now:,.1f} rows/s")
+        if regressions:
+            sys.exit(1)
+        print(f"No stage slower than the baseline by more than {args.tolerance:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+New_Lead_Time: row-wise apply vs. vectorized engine.
+
+First checks that compute_new_lead_time() matches calculate_new_lead_time()
+on every branch (and on a random mix), then times both at --rows rows.
+
+Example:
+    python benchmarks/bench_lead_time.py --rows 1000000
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "tests"))
+
+from lead_time import calculate_new_lead_time, compute_new_lead_time
+from lead_time_samples import branch_frame, random_frame
+
+
+def check_equivalence(df, label):
+    expected = df.apply(calculate_new_lead_time, axis=1).astype("int64")
+    actual = compute_new_lead_time(df)
+    mismatches = df[expected.to_numpy() != actual.to_numpy()]
+    if not mismatches.empty:
+        print(mismatches.head(20))
+        raise SystemExit(f"{label}: {len(mismatches)} rows differ")
+    print(f"{label}: {len(df)} rows identical")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--skip-apply", action="store_true", help="only time the vectorized engine")
+    args = parser.parse_args()
+
+    check_equivalence(branch_frame(), "all branches")
+    check_equivalence(random_frame(20_000, seed=1), "random mix")
+
+    df = random_frame(args.rows)
+
+    start = time.perf_counter()
+    vectorized = compute_new_lead_time(df)
+    vec_seconds = time.perf_counter() - start
+    print(f"vectorized: {vec_seconds:8.3f} s  {args.rows / vec_seconds:>12,.0f} rows/s")
+
+    if not args.skip_apply:
+        start = time.perf_counter()
+        applied = df.apply(calculate_new_lead_time, axis=1)
+        apply_seconds = time.perf_counter() - start
+        print(f"apply:      {apply_seconds:8.3f} s  {args.rows / apply_seconds:>12,.0f} rows/s")
+        print(f"speed-up:   {apply_seconds / vec_seconds:8.1f}x")
+        assert (applied.to_numpy() == vectorized.to_numpy()).all()
+
+
+if __name__ == "__main__":
+    main()
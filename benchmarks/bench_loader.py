@@ -0,0 +1,95 @@
+"""
+Insert throughput of the bulk loader vs. a plain DataFrame.to_sql append.
+
+Runs against a throw-away SQLite file by default; pass --url to load into
+a local MySQL instead (the target table is dropped and recreated).
+
+Example:
+    python benchmarks/bench_loader.py --rows 200000
+    python benchmarks/bench_loader.py --url mysql+pymysql://root:pw@localhost/bench --methods executemany,infile
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine, text
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mysql_loader import BulkLoader, get_engine
+from pipeline import FINAL_COLUMNS
+
+
+def make_rows(rows, seed=0):
+    """
+    A cleaned productdetails batch with realistic value shapes.
+    """
+    rng = np.random.default_rng(seed)
+    parts = np.array([f"PN-{i:07d}" for i in range(max(1, rows // 6))])
+    df = pd.DataFrame({
+        "Categories": rng.choice(["Passive", "Power", "Sensors", "Connectors"], rows),
+        "Sub_Categories": rng.choice(["Resistors", "Relays", "Fuses", "Cables"], rows),
+        "Sub_Categories2": rng.choice(["SMD", "THT", "Panel"], rows),
+        "Part_Number": rng.choice(parts, rows),
+        "Manufacturer": rng.choice(["eaton", "schneider electric", "sick electronics", "bud industries"], rows),
+        "Unit_break_QTY": rng.choice([1, 10, 100, 1000], rows),
+        "Unit_price_EUR": rng.gamma(2.0, 5.0, rows).round(4),
+        "Lead_time": rng.choice(["4 weeks", "10 days", "unknown"], rows),
+        "Lead_time_weeks": rng.choice(["4", "unknown"], rows),
+        "Lead_time_format": rng.choice(["weeks", "days", "unknown"], rows),
+        "Quantity_in_stock": rng.integers(0, 100000, rows),
+        "Factory_stock_quantity": rng.integers(0, 1000, rows),
+        "On_order_quantity": rng.integers(0, 1000, rows),
+        "Partner_stock_quantity": rng.integers(0, 1000, rows),
+        "Distributor_name": rng.choice(["Mouser", "Digi-Key", "Farnell", "RS Components", "TME"], rows),
+        "Distributor_region": rng.choice(["Europe", "Americas"], rows),
+        "Distributor_country": rng.choice(["DE", "GB", "US"], rows),
+        "Image_URL": "https://example.com/img.jpg",
+        "Buy_now_URL": "https://example.com/buy",
+        "Category": rng.choice(["Relays", "Resistors"], rows),
+        "Description": "Synthetic benchmark part, 24V, 10A",
+        "New_Lead_Time": rng.choice([0, 10, 28], rows),
+    })
+    return df[FINAL_COLUMNS].assign(DataPulledTime=datetime.now())
+
+
+def reset_table(url, table):
+    with create_engine(url).begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {table}"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--batch-size", type=int, default=50_000)
+    parser.add_argument("--url", default="")
+    parser.add_argument("--table", default="bench_productdetails")
+    parser.add_argument("--methods", default="plain,executemany")
+    args = parser.parse_args()
+
+    url = args.url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    df = make_rows(args.rows)
+    batches = [df.iloc[i:i + args.batch_size] for i in range(0, len(df), args.batch_size)]
+
+    print(f"target: {url.split('@')[-1]}  rows: {args.rows:,}")
+    for method in args.methods.split(","):
+        reset_table(url, args.table)
+        start = time.perf_counter()
+        if method == "plain":
+            # What the ingest used to do: fresh engine, default to_sql
+            df.to_sql(name=args.table, con=create_engine(url), if_exists="append", index=False)
+        else:
+            loader = BulkLoader(get_engine(url, local_infile=method == "infile"), args.table, method=method)
+            for batch in batches:
+                loader.write(batch)
+        elapsed = time.perf_counter() - start
+        print(f"{method:>12}: {elapsed:8.2f} s  {args.rows / elapsed:>10,.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
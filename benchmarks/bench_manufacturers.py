@@ -0,0 +1,88 @@
+"""
+Manufacturer cleanup: original pandas chain vs. memoized normalizer.
+
+Builds --rows rows drawn from --distinct raw manufacturer strings, checks
+that both give identical names and reports rows/second for each.
+
+Example:
+    python benchmarks/bench_manufacturers.py --rows 1000000 --distinct 300
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from manufacturers import ManufacturerNormalizer, load_aliases
+
+BASE_NAMES = [
+    "Eaton", "Eaton HAC", "Schneider Electric-Legacy Relays", "SICK, Inc.", "Bud Industries Inc.",
+    "Texas Instruments Inc.", "Phoenix Contact GmbH & Co. KG", "TE Connectivity / Raychem",
+    "Visaton GmbH & Co", "Qualtek Electronics Corp", "American Power Conversion APC",
+    "Apex Tool Group Mfr.", "WhiteRodgers", "Murata Manufacturing Co., Ltd.", "ABB  Ltd",
+    "Omron Corporation", "Würth Elektronik", "3M Company", "Molex, LLC", "CAL",
+]
+
+
+def legacy_chain(series, name_mapping):
+    """
+    The cleanup exactly as pull_and_insert_data() used to run it.
+    """
+    s = series.str.lower()
+    s = s.replace(name_mapping)
+    s = s.str.split("/").str[0].str.strip()
+
+    def remove_suffixes(name):
+        pattern = r"\b(?:llc|inc|ltd|corporation|co|company|gmbh|s\.a|srl|plc|pvt|mfr|corp)\b\.?"
+        return re.sub(pattern, "", name, flags=re.IGNORECASE).strip()
+
+    s = s.apply(remove_suffixes)
+    s = s.str.replace(r"[^\w\s]", "", regex=True)
+    s = s.str.replace(r"\s+", " ", regex=True).str.strip()
+    return s
+
+
+def make_series(rows, distinct, seed=0):
+    names = [f"{BASE_NAMES[i % len(BASE_NAMES)]}{'' if i < len(BASE_NAMES) else f' {i}'}"
+             for i in range(distinct)]
+    rng = np.random.default_rng(seed)
+    return pd.Series(rng.choice(names, rows), name="Manufacturer")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--distinct", type=int, default=300)
+    parser.add_argument("--aliases", default=os.path.join(ROOT, "manufacturer_aliases.json"))
+    args = parser.parse_args()
+
+    aliases = load_aliases(args.aliases)
+    series = make_series(args.rows, args.distinct)
+
+    start = time.perf_counter()
+    expected = legacy_chain(series, aliases)
+    chain_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    actual = ManufacturerNormalizer(aliases).normalize(series)
+    memo_seconds = time.perf_counter() - start
+
+    if not expected.equals(actual):
+        diff = pd.DataFrame({"raw": series, "chain": expected, "normalizer": actual})
+        print(diff[diff["chain"] != diff["normalizer"]].drop_duplicates().head(20))
+        raise SystemExit("normalizer output differs from the original chain")
+
+    print(f"rows: {args.rows:,}  distinct names: {series.nunique()}")
+    print(f"original chain: {chain_seconds:8.3f} s  {args.rows / chain_seconds:>12,.0f} rows/s")
+    print(f"normalizer:     {memo_seconds:8.3f} s  {args.rows / memo_seconds:>12,.0f} rows/s")
+    print(f"speed-up:       {chain_seconds / memo_seconds:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
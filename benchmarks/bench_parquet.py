@@ -0,0 +1,76 @@
+"""
+Long-range price trend queries on the Parquet export, single-threaded DuckDB.
+
+Writes --days daily runs of --rows-per-day rows through ParquetExporter
+(the same writer the ingest uses), then times typical analyst questions
+over the whole span with DuckDB limited to one thread.
+
+Example (one year, ~18M rows):
+    python benchmarks/bench_parquet.py --days 365 --rows-per-day 50000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "streamlit_app"))
+
+from bench_loader import make_rows
+from duckdb_queries import connect, dataset_source
+from parquet_export import ParquetExporter
+
+QUERIES = {
+    "monthly avg price per manufacturer":
+        "SELECT date_trunc('month', Pulled_Date) AS month, Manufacturer, AVG(Unit_price_EUR) "
+        "FROM {s} GROUP BY ALL",
+    "weekly avg price, one category":
+        "SELECT date_trunc('week', Pulled_Date) AS week, AVG(Unit_price_EUR) "
+        "FROM {s} WHERE Categories = 'Power' GROUP BY ALL",
+    "one part's history":
+        "SELECT DataPulledTime, Distributor_name, Unit_price_EUR FROM {s} "
+        "WHERE Part_Number = 'PN-0000042' ORDER BY DataPulledTime",
+    "last 30 days, per distributor":
+        "SELECT Distributor_name, AVG(Unit_price_EUR), COUNT(*) FROM {s} "
+        "WHERE Pulled_Date >= current_date - INTERVAL 30 DAY GROUP BY ALL",
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--dir", default="", help="dataset directory (default: a temp dir)")
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--rows-per-day", type=int, default=50_000)
+    parser.add_argument("--threads", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--skip-write", action="store_true", help="reuse an existing dataset")
+    args = parser.parse_args()
+
+    root_dir = args.dir or tempfile.mkdtemp()
+    if not args.skip_write:
+        start = time.perf_counter()
+        today = datetime.now().replace(hour=21, minute=30, second=0, microsecond=0)
+        for day in range(args.days):
+            pulled_time = today - timedelta(days=day)
+            batch = make_rows(args.rows_per_day, seed=day).assign(DataPulledTime=pulled_time)
+            ParquetExporter(root_dir, pulled_time).write(batch)
+        print(f"Wrote {args.days * args.rows_per_day:,} rows in {time.perf_counter() - start:.1f} s to {root_dir}")
+
+    conn = connect(threads=args.threads)
+    source = dataset_source(root_dir)
+    print(f"{'query':<38} {'best s':>8} {'rows':>8}")
+    for label, sql in QUERIES.items():
+        best = None
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            result = conn.execute(sql.format(s=source)).fetchall()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        print(f"{label:<38} {best:>8.2f} {len(result):>8}")
+
+
+if __name__ == "__main__":
+    main()
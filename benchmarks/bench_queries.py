@@ -0,0 +1,117 @@
+"""
+Dashboard query latency on the managed productdetails schema.
+
+Creates the table through schema.migrate() in the target database, loads a
+seed batch and doubles it server-side (each copy shifted further back in
+time, so the rows spread over many monthly partitions) until --rows rows
+exist, then times the dashboard's typical queries.
+
+Example (local MySQL, ~100M rows):
+    python benchmarks/bench_queries.py --url mysql+pymysql://root:pw@localhost/bench --rows 100000000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench_loader import make_rows
+from mysql_loader import COLUMN_TYPES, BulkLoader, get_engine
+from schema import ensure_partitions, migrate
+
+QUERIES = {
+    "part price history":
+        "SELECT DataPulledTime, Distributor_name, Unit_price_EUR FROM {t} "
+        "WHERE Part_Number = :part ORDER BY DataPulledTime",
+    "avg price per manufacturer, last 30 days":
+        "SELECT Manufacturer, AVG(Unit_price_EUR) FROM {t} "
+        "WHERE DataPulledTime >= :since GROUP BY Manufacturer",
+    "avg price per distributor, one category":
+        "SELECT Distributor_name, AVG(Unit_price_EUR) FROM {t} "
+        "WHERE Categories = :category GROUP BY Distributor_name",
+    "latest snapshot row count":
+        "SELECT COUNT(*) FROM {t} WHERE DataPulledTime = (SELECT MAX(DataPulledTime) FROM {t})",
+}
+
+
+def fill(engine, table, rows, seed_rows):
+    """
+    Loads `seed_rows` rows, then doubles the table with INSERT ... SELECT,
+    shifting each copy back by the current span of days.
+    """
+    BulkLoader(engine, table).write(make_rows(seed_rows))
+    count = seed_rows
+    shift_days = 1
+    columns = ", ".join(c for c in COLUMN_TYPES if c != "DataPulledTime")
+    if engine.dialect.name == "mysql":
+        shifted = "DataPulledTime - INTERVAL {days} DAY"
+    else:
+        shifted = "datetime(DataPulledTime, '-{days} days')"
+
+    while count < rows:
+        limit = rows - count
+        start = time.perf_counter()
+        with engine.begin() as conn:
+            conn.execute(text(
+                f"INSERT INTO {table} ({columns}, DataPulledTime) "
+                f"SELECT {columns}, {shifted.format(days=shift_days)} FROM {table} LIMIT {limit}"
+            ))
+        count += min(limit, count)
+        shift_days *= 2
+        print(f"  {count:>13,} rows ({time.perf_counter() - start:.1f} s)")
+    return shift_days
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", default="")
+    parser.add_argument("--table", default="bench_productdetails")
+    parser.add_argument("--rows", type=int, default=100_000_000)
+    parser.add_argument("--seed-rows", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--skip-fill", action="store_true", help="reuse an already filled table")
+    args = parser.parse_args()
+
+    url = args.url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    engine = get_engine(url)
+
+    if not args.skip_fill:
+        with engine.begin() as conn:
+            conn.execute(text(f"DROP TABLE IF EXISTS {args.table}"))
+            conn.execute(text("DROP TABLE IF EXISTS schema_migrations"))
+        migrate(engine, args.table)
+        # Enough monthly partitions for the span that doubling will cover
+        span_days = 2 ** max(0, (args.rows // args.seed_rows).bit_length())
+        ensure_partitions(engine, args.table, start=datetime.now() - timedelta(days=span_days))
+        print(f"Filling {args.table} to {args.rows:,} rows")
+        fill(engine, args.table, args.rows, args.seed_rows)
+
+    params = {
+        "part": "PN-0000042",
+        "since": datetime.now() - timedelta(days=30),
+        "category": "Power",
+    }
+    print(f"{'query':<42} {'best ms':>10} {'rows':>8}")
+    with engine.connect() as conn:
+        for label, sql in QUERIES.items():
+            statement = text(sql.format(t=args.table))
+            best = None
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                result = conn.execute(statement, params).fetchall()
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            print(f"{label:<42} {best * 1000:>10.1f} {len(result):>8}")
+            if engine.dialect.name == "mysql":
+                plan = conn.execute(text(f"EXPLAIN {sql.format(t=args.table)}"), params).mappings().first()
+                print(f"{'':<4}key={plan.get('key')} partitions={plan.get('partitions')}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Synthetic parts catalog in the layout of v2_All_products.xlsx.
+
+The format follows the extension of --out (.xlsx, .csv or .parquet).
+
+Example (100k parts):
+    python benchmarks/make_catalog.py --parts 100000 --out /tmp/catalog.xlsx
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+CATEGORIES = {
+    "Passive": {"Resistors": ["SMD", "THT"], "Capacitors": ["Ceramic", "Electrolytic"]},
+    "Power": {"Relays": ["Signal", "Power"], "Fuses": ["Cartridge", "Resettable"]},
+    "Sensors": {"Proximity": ["Inductive", "Capacitive"], "Photoelectric": ["Diffuse", "Through-beam"]},
+    "Connectors": {"Terminal Blocks": ["Screw", "Spring"], "Cables": ["Shielded", "Unshielded"]},
+}
+
+
+def make_catalog(parts, seed=0):
+    """
+    DataFrame with Part_Number, Categories, Sub_Categories, Sub_Categories2.
+    """
+    rng = np.random.default_rng(seed)
+    paths = [
+        (category, sub, sub2)
+        for category, subs in CATEGORIES.items()
+        for sub, subs2 in subs.items()
+        for sub2 in subs2
+    ]
+    picks = rng.integers(0, len(paths), parts)
+    categories, sub_categories, sub_categories2 = (np.array(column, dtype=object) for column in zip(*paths))
+    return pd.DataFrame({
+        "Part_Number": [f"BENCH-{i:07d}" for i in range(parts)],
+        "Categories": categories[picks],
+        "Sub_Categories": sub_categories[picks],
+        "Sub_Categories2": sub_categories2[picks],
+    })
+
+
+def write_catalog(df, path):
+    if path.endswith(".csv"):
+        df.to_csv(path, index=False)
+    elif path.endswith(".parquet"):
+        df.to_parquet(path, index=False)
+    else:
+        df.to_excel(path, sheet_name="Sheet1", index=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--parts", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="bench_catalog.xlsx")
+    args = parser.parse_args()
+
+    write_catalog(make_catalog(args.parts, seed=args.seed), args.out)
+    print(f"Wrote {args.parts:,} parts to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""
+Local stand-in for the OEM Secrets partsearch endpoint.
+
+Serves /partsearch over plain HTTP with an artificial per-request latency,
+so the ingest can be benchmarked without touching the real API or quota.
+Payloads are generated per part number (same part, same answer): several
+distributors, price breaks, lead-time formats and manufacturer spellings.
+Error rates for 429/5xx answers and a per-key quota (401 once used up)
+exercise the client's retries and the key rotation.
+
+Run it directly to keep a server up, or use start_mock_server() from a
+benchmark script.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+DISTRIBUTORS = [
+    ("Mouser", "Europe", "DE"),
+    ("Digi-Key", "Americas", "US"),
+    ("Farnell", "Europe", "GB"),
+    ("RS Components", "Europe", "GB"),
+    ("TME", "Europe", "PL"),
+    ("Arrow", "Americas", "US"),
+    ("Conrad", "Europe", "DE"),
+]
+
+MANUFACTURERS = [
+    "Eaton", "EATON Corp.", "Schneider Electric", "Schneider Electric SE", "SICK AG",
+    "Phoenix Contact GmbH & Co. KG", "TE Connectivity Ltd.", "Bud Industries Inc", "Omron",
+]
+
+LEAD_TIMES = [
+    ("4 weeks", "4", "weeks"),
+    ("12 weeks", "12", "weeks"),
+    ("10 days", "N/A", "days"),
+    ("N/A", "N/A", "N/A"),
+    ("unknown", "unknown", "unknown"),
+]
+
+UNIT_BREAKS = [1, 10, 25, 100, 250, 1000, 5000]
+
+
+def build_payload(part_number, empty_rate=0.0):
+    """
+    Returns a partsearch-style JSON body for a part number. The content is
+    derived from the part number, so repeated calls give the same answer.
+    """
+    rng = random.Random(zlib.crc32(part_number.encode("utf-8")))
+    if rng.random() < empty_rate:
+        return {"stock": []}
+
+    manufacturer = rng.choice(MANUFACTURERS)
+    base_price = round(rng.lognormvariate(1.0, 1.2), 4)
+    stock = []
+    for name, region, country in rng.sample(DISTRIBUTORS, rng.randint(1, 5)):
+        lead_time, lead_time_weeks, lead_time_format = rng.choice(LEAD_TIMES)
+        markup = rng.uniform(0.9, 1.3)
+        breaks = sorted(rng.sample(UNIT_BREAKS, rng.randint(1, 5)))
+        stock.append({
+            "manufacturer": manufacturer,
+            "description": f"Mock part {part_number}",
+            "category": rng.choice(["Relays", "Resistors", "Connectors", "Sensors"]),
+            "quantity_in_stock": rng.choice([0, rng.randint(1, 100000)]),
+            "factory_stock_quantity": rng.randint(0, 5000),
+            "on_order_quantity": rng.randint(0, 5000),
+            "partner_stock_quantity": rng.choice([0, "", rng.randint(1, 1000)]),
+            "distributor": {
+                "distributor_name": name,
+                "distributor_region": region,
+                "distributor_country": country,
+            },
+            "lead_time": lead_time,
+            "lead_time_weeks": lead_time_weeks,
+            "lead_time_format": lead_time_format,
+            "image_url": f"https://example.com/img/{part_number}.jpg",
+            "buy_now_url": f"https://example.com/buy/{name.lower().replace(' ', '-')}/{part_number}",
+            "prices": {"EUR": [
+                {"unit_break": b, "unit_price": round(base_price * markup * (1 - 0.05 * i), 4)}
+                for i, b in enumerate(breaks)
+            ]},
+        })
+    return {"stock": stock}
+
+
+class MockPartsearchServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+    def __init__(self, address, latency=0.05, exhausted_keys=(), rate_429=0.0, rate_5xx=0.0,
+                 empty_rate=0.0, key_quota=0, seed=0):
+        super().__init__(address, PartsearchHandler)
+        self.latency = latency
+        self.exhausted_keys = set(exhausted_keys)
+        self.rate_429 = rate_429
+        self.rate_5xx = rate_5xx
+        self.empty_rate = empty_rate
+        # Successful calls per key before it answers 401 (0 = unlimited)
+        self.key_quota = key_quota
+        self.key_calls = {}
+        self.status_counts = {}
+        self.request_count = 0
+        self.random = random.Random(seed)
+        self._count_lock = threading.Lock()
+
+
+class PartsearchHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        with server._count_lock:
+            server.request_count += 1
+            roll = server.random.random()
+
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        if url.path != "/partsearch":
+            return self._send(404, {"error": "not found"})
+
+        time.sleep(server.latency)
+        if roll < server.rate_429:
+            return self._send(429, {"error": "too many requests"}, {"Retry-After": "0"})
+        if roll < server.rate_429 + server.rate_5xx:
+            return self._send(503, {"error": "service unavailable"})
+
+        api_key = query.get("apiKey", [""])[0]
+        with server._count_lock:
+            used = server.key_calls.get(api_key, 0)
+            exhausted = api_key in server.exhausted_keys or (server.key_quota and used >= server.key_quota)
+            if not exhausted:
+                server.key_calls[api_key] = used + 1
+        if exhausted:
+            return self._send(401, {"error": "API key exhausted"})
+
+        part_number = query.get("searchTerm", [""])[0]
+        if not part_number:
+            return self._send(400, {"error": "missing searchTerm"})
+        return self._send(200, build_payload(part_number, empty_rate=server.empty_rate))
+
+    def _send(self, status, body, headers=None):
+        with self.server._count_lock:
+            self.server.status_counts[status] = self.server.status_counts.get(status, 0) + 1
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_mock_server(host="127.0.0.1", port=0, **kwargs):
+    """
+    Starts the mock server on a background thread and returns
+    (server, base_url). Port 0 picks a free port.
+    """
+    server = MockPartsearchServer((host, port), **kwargs)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base_url = f"http://{host}:{server.server_address[1]}/partsearch"
+    return server, base_url
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mock OEM Secrets partsearch server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per request")
+    parser.add_argument("--exhausted-key", action="append", default=[], help="key that answers 401")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="share of requests answered 429")
+    parser.add_argument("--rate-5xx", type=float, default=0.0, help="share of requests answered 503")
+    parser.add_argument("--empty-rate", type=float, default=0.0, help="share of parts without stock")
+    parser.add_argument("--key-quota", type=int, default=0, help="calls per key before 401 (0 = unlimited)")
+    args = parser.parse_args()
+
+    server, base_url = start_mock_server(
+        args.host, args.port, latency=args.latency, exhausted_keys=args.exhausted_key,
+        rate_429=args.rate_429, rate_5xx=args.rate_5xx, empty_rate=args.empty_rate,
+        key_quota=args.key_quota,
+    )
+    print(f"Mock partsearch server listening on {base_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
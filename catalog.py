@@ -0,0 +1,197 @@
+"""
+Input catalog of parts to look up.
+
+CATALOG_PATH may point at an Excel workbook, a CSV file or a Parquet file
+with the columns Part_Number, Categories, Sub_Categories, Sub_Categories2
+(surrounding whitespace in the headers is ignored, other columns are
+dropped).
+
+Parsing a large workbook with openpyxl takes seconds to minutes, and the
+file rarely changes between daily runs. The parsed catalog is therefore
+kept as Parquet in a cache folder: a run whose workbook has the same size
+and mtime (or, after a touch/copy, the same SHA-256) reads the Parquet
+copy instead. CSV and Parquet catalogs are read directly.
+"""
+import hashlib
+import json
+import os
+import tempfile
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+CATALOG_COLUMNS = ["Part_Number", "Categories", "Sub_Categories", "Sub_Categories2"]
+EXCEL_EXTENSIONS = {".xlsx", ".xlsm", ".xls"}
+
+# Rows per DataFrame yielded by iter_catalog()
+CHUNK_ROWS = 50_000
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _select_columns(df):
+    df.columns = df.columns.str.strip()
+    missing = [column for column in CATALOG_COLUMNS if column not in df.columns]
+    if missing:
+        raise ValueError(f"Catalog is missing columns: {', '.join(missing)}")
+    return df[CATALOG_COLUMNS]
+
+
+def _read_excel(path, sheet_name):
+    df = _select_columns(pd.read_excel(
+        path, sheet_name=sheet_name, usecols=lambda column: str(column).strip() in CATALOG_COLUMNS,
+    ))
+    # Cells typed as numbers come back as int/float; the columns are text
+    # (and Parquet needs one type per column)
+    return df.assign(**{
+        column: df[column].where(df[column].isna(), df[column].astype(str)) for column in CATALOG_COLUMNS
+    })
+
+
+def _read_csv(path, **kwargs):
+    return pd.read_csv(
+        path, usecols=lambda column: column.strip() in CATALOG_COLUMNS, dtype=str,
+        keep_default_na=False, na_values=[""], **kwargs,
+    )
+
+
+def _parquet_columns(parquet_file):
+    """
+    {catalog column: column name in the file} (the file's may be padded).
+    """
+    names = {name.strip(): name for name in parquet_file.schema_arrow.names}
+    missing = [column for column in CATALOG_COLUMNS if column not in names]
+    if missing:
+        raise ValueError(f"Catalog is missing columns: {', '.join(missing)}")
+    return {column: names[column] for column in CATALOG_COLUMNS}
+
+
+class CatalogCache:
+    """
+    Parquet copies of parsed Excel catalogs, one per workbook name.
+
+    <cache_dir>/<name>.parquet holds the parsed parts, <name>.json the
+    size, mtime and SHA-256 of the workbook it was parsed from.
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def paths(self, path, sheet_name):
+        name = f"{os.path.basename(path)}.{sheet_name}"
+        base = os.path.join(self.cache_dir, name)
+        return f"{base}.parquet", f"{base}.json"
+
+    def lookup(self, path, sheet_name):
+        """
+        Path of a cached Parquet copy of the workbook, or None when there
+        is none or it is out of date.
+        """
+        parquet_path, meta_path = self.paths(path, sheet_name)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not os.path.exists(parquet_path):
+            return None
+        stat = os.stat(path)
+        if (meta.get("size"), meta.get("mtime_ns")) == (stat.st_size, stat.st_mtime_ns):
+            return parquet_path
+        # Same size but another mtime: a touched or copied file may still be unchanged
+        if meta.get("size") == stat.st_size and meta.get("sha256") == _file_sha256(path):
+            self._write_meta(meta_path, stat, meta["sha256"])
+            return parquet_path
+        return None
+
+    def store(self, path, sheet_name, df):
+        """
+        Saves the parsed workbook and returns the Parquet path.
+        """
+        parquet_path, meta_path = self.paths(path, sheet_name)
+        stat = os.stat(path)
+        sha256 = _file_sha256(path)
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        os.close(fd)
+        pq.write_table(table, tmp_path, compression="zstd")
+        os.replace(tmp_path, parquet_path)
+        self._write_meta(meta_path, stat, sha256)
+        return parquet_path
+
+    @staticmethod
+    def _write_meta(meta_path, stat, sha256):
+        with open(meta_path, "w", encoding="utf-8") as f:
+            json.dump({"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": sha256}, f)
+
+
+def _cached_parquet(path, cache_dir, sheet_name):
+    """
+    Parquet copy of an Excel catalog, parsing the workbook only when it changed.
+    """
+    cache = CatalogCache(cache_dir)
+    cached = cache.lookup(path, sheet_name)
+    if cached is not None:
+        return cached
+    return cache.store(path, sheet_name, _read_excel(path, sheet_name))
+
+
+def _source(path, cache_dir, sheet_name):
+    """
+    (path, format) to read: workbooks are swapped for their cached Parquet copy.
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Input file not found: {path}")
+    ext = os.path.splitext(path)[1].lower()
+    if ext in EXCEL_EXTENSIONS:
+        if not cache_dir:
+            return path, "excel"
+        return _cached_parquet(path, cache_dir, sheet_name), "parquet"
+    if ext in (".parquet", ".csv"):
+        return path, ext[1:]
+    raise ValueError(f"Unsupported catalog format: {path}")
+
+
+def load_catalog(path, cache_dir="", sheet_name="Sheet1"):
+    """
+    The whole catalog as a DataFrame with CATALOG_COLUMNS.
+
+    Excel workbooks go through the Parquet cache when `cache_dir` is set.
+    """
+    path, kind = _source(path, cache_dir, sheet_name)
+    if kind == "excel":
+        return _read_excel(path, sheet_name)
+    if kind == "parquet":
+        parquet_file = pq.ParquetFile(path)
+        columns = _parquet_columns(parquet_file)
+        return _select_columns(parquet_file.read(columns=list(columns.values())).to_pandas())
+    return _select_columns(_read_csv(path))
+
+
+def iter_catalog(path, cache_dir="", sheet_name="Sheet1", chunk_rows=CHUNK_ROWS):
+    """
+    Yields the catalog as DataFrames of at most `chunk_rows` rows, so a
+    large CSV/Parquet catalog never has to be in memory at once. Excel
+    workbooks are parsed whole (into the cache, when set) first.
+    """
+    path, kind = _source(path, cache_dir, sheet_name)
+    if kind == "excel":
+        df = _read_excel(path, sheet_name)
+        for start in range(0, len(df), chunk_rows):
+            yield df.iloc[start:start + chunk_rows]
+    elif kind == "parquet":
+        parquet_file = pq.ParquetFile(path)
+        columns = _parquet_columns(parquet_file)
+        for batch in parquet_file.iter_batches(batch_size=chunk_rows, columns=list(columns.values())):
+            yield _select_columns(batch.to_pandas())
+    else:
+        for chunk in _read_csv(path, chunksize=chunk_rows):
+            yield _select_columns(chunk)
@@ -0,0 +1,107 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from oem_client import OEMSecretsClient
+
+
+class FetchEngine:
+    """
+    Fetches partsearch results for many part numbers with a bounded
+    thread pool. All workers share one KeyPool: a 401 marks the key as
+    exhausted for everybody and the part moves on to the next live key,
+    while 400/404 and other errors skip the part.
+
+    With a ResponseCache, successful answers are stored on disk; in
+    resume mode parts that already have a fresh entry are not fetched.
+    """
+
+    def __init__(self, key_pool, concurrency=8, client=None, cache=None, resume=False):
+        self.key_pool = key_pool
+        self.concurrency = max(1, int(concurrency))
+        self.client = client or OEMSecretsClient(pool_size=self.concurrency)
+        self.cache = cache
+        self.resume = resume
+
+    def lookup(self, part_number):
+        """
+        Returns the partsearch JSON for a part, from the cache when resuming
+        and the entry is fresh, otherwise from the API.
+        """
+        country_code, currency = self.client.country_code, self.client.currency
+        if self.cache is not None and self.resume:
+            cached = self.cache.get(part_number, country_code, currency)
+            if cached is not None:
+                return cached
+
+        part_info = self.get_part_info(part_number)
+        if part_info is not None and self.cache is not None:
+            self.cache.put(part_number, country_code, currency, part_info)
+        return part_info
+
+    def get_part_info(self, part_number):
+        """
+        Fetches data for a given part_number with the best available key.
+        Returns the JSON response if successful, otherwise None.
+        """
+        tried = set()
+        while True:
+            api_key = self.key_pool.acquire(exclude=tried)
+            if api_key is None:
+                break
+            tried.add(api_key)
+
+            def before_attempt(attempt, api_key=api_key):
+                # acquire() already waited for the first request's slot
+                if attempt:
+                    self.key_pool.wait(api_key)
+
+            try:
+                response = self.client.search(
+                    part_number, api_key,
+                    before_attempt=before_attempt,
+                    after_attempt=lambda response, api_key=api_key: self.key_pool.record_use(api_key, response),
+                )
+                response.raise_for_status()
+                return response.json()
+            except requests.exceptions.HTTPError as http_err:
+                if response.status_code == 401:
+                    self.key_pool.mark_exhausted(api_key)
+                    continue
+                elif response.status_code in {400, 404}:
+                    print(f"No data for {part_number}: {http_err}")
+                    return None
+                else:
+                    print(f"HTTP error for {part_number}: {http_err}")
+                    return None
+            except requests.exceptions.RequestException as e:
+                print(f"Request error for {part_number}: {e}")
+                return None
+
+        print("All API keys exhausted.")
+        return None
+
+    def fetch_all(self, items, get_part_number=None):
+        """
+        Yields (item, part_info) for every item, in input order.
+
+        `items` can be any iterable (e.g. catalog rows); `get_part_number`
+        extracts the part number from an item and defaults to the item
+        itself. Only a small window of lookups is in flight at once, so
+        results can be consumed as a stream.
+        """
+        if get_part_number is None:
+            get_part_number = lambda item: item
+
+        window = self.concurrency * 4
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            for item in items:
+                pending.append((item, executor.submit(self.lookup, get_part_number(item))))
+                if len(pending) >= window:
+                    item, future = pending.popleft()
+                    yield item, future.result()
+            while pending:
+                item, future = pending.popleft()
+                yield item, future.result()
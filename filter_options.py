@@ -0,0 +1,122 @@
+"""
+Values offered by the dashboard's sidebar filters.
+
+Listing them with SELECT DISTINCT over the history table scans it for
+every column without an index, after every ingest. <table>_filter_options
+holds each distinct value once instead: one row per (column, value), and
+for the cascading category filters per parent categories too. Every batch
+the ingest appends to history adds its new values in the same
+transaction, and the migration that creates the table fills it from the
+history already there.
+
+Values are only added, never removed: a value whose rows were deleted
+(e.g. by a retried shard) stays offered and simply matches no rows.
+"""
+import numpy as np
+import pandas as pd
+from sqlalchemy import BigInteger, Column, Index, String, Table, text
+
+# Filter columns with listed options (Part_Number is searched instead)
+OPTION_COLUMNS = [
+    "Categories",
+    "Sub_Categories",
+    "Sub_Categories2",
+    "Manufacturer",
+    "Distributor_name",
+    "Distributor_region",
+    "Distributor_country",
+    "Unit_break_QTY",
+]
+
+# Cascading filters: an option is stored per value of its parent columns
+OPTION_PARENTS = {
+    "Sub_Categories": ["Categories"],
+    "Sub_Categories2": ["Categories", "Sub_Categories"],
+}
+
+PARENT_COLUMNS = ["Categories", "Sub_Categories"]
+
+
+def filter_options_table(metadata, table):
+    name = f"{table}_filter_options"
+    return Table(
+        name, metadata,
+        Column("Option_Key", BigInteger(), primary_key=True, autoincrement=False),
+        Column("Column_Name", String(64), nullable=False),
+        Column("Value", String(255), nullable=False),
+        Column("Categories", String(255)),
+        Column("Sub_Categories", String(255)),
+        Index(f"{name}_idx_column", "Column_Name", "Categories", "Sub_Categories"),
+        mysql_engine="InnoDB", mysql_charset="utf8mb4",
+    )
+
+
+def _as_text(values, column):
+    """
+    Option values as text, the same whether they come from a batch or from SQL.
+    """
+    if column == "Unit_break_QTY":
+        values = pd.to_numeric(values, errors="coerce").astype("Int64")
+    values = values.astype(object)
+    return values.where(values.notna(), None).map(lambda value: None if value is None else str(value))
+
+
+def option_rows(df):
+    """
+    The distinct (Column_Name, Value, Categories, Sub_Categories) rows of a
+    batch, with their Option_Key.
+    """
+    frames = []
+    for column in OPTION_COLUMNS:
+        if column not in df.columns:
+            continue
+        parents = OPTION_PARENTS.get(column, [])
+        values = pd.DataFrame({"Value": _as_text(df[column], column)})
+        for parent in PARENT_COLUMNS:
+            values[parent] = _as_text(df[parent], parent) if parent in parents else None
+        values = values[values["Value"].notna()].drop_duplicates()
+        frames.append(values.assign(Column_Name=column))
+    if not frames:
+        return pd.DataFrame(columns=["Option_Key", "Column_Name", "Value"] + PARENT_COLUMNS)
+    rows = pd.concat(frames, ignore_index=True)
+    key_columns = ["Column_Name", "Value"] + PARENT_COLUMNS
+    hashed = pd.util.hash_pandas_object(rows[key_columns].fillna("\0"), index=False)
+    return rows.assign(Option_Key=hashed.to_numpy().view(np.int64))[["Option_Key"] + key_columns]
+
+
+def _insert_ignore_sql(dialect_name, options):
+    columns = ["Option_Key", "Column_Name", "Value"] + PARENT_COLUMNS
+    values = f"({', '.join(columns)}) VALUES ({', '.join(':' + c for c in columns)})"
+    if dialect_name == "mysql":
+        return f"INSERT IGNORE INTO {options} {values}"
+    return f"INSERT INTO {options} {values} ON CONFLICT (Option_Key) DO NOTHING"
+
+
+def add_filter_options(conn, table, df):
+    """
+    Adds the filter values of a batch of history rows that are not stored
+    yet. Call it with the connection that inserts the rows into history.
+    Returns the number of option rows offered to the table.
+    """
+    if df.empty:
+        return 0
+    rows = option_rows(df)
+    if rows.empty:
+        return 0
+    records = rows.astype(object).where(rows.notna(), None).to_dict("records")
+    conn.execute(text(_insert_ignore_sql(conn.dialect.name, f"{table}_filter_options")), records)
+    return len(records)
+
+
+def rebuild_filter_options(conn, table):
+    """
+    Refills the table from the distinct values in the history table.
+    """
+    conn.execute(text(f"DELETE FROM {table}_filter_options"))
+    for column in OPTION_COLUMNS:
+        parents = OPTION_PARENTS.get(column, [])
+        selected = ", ".join([column] + parents)
+        distinct = pd.read_sql(
+            text(f"SELECT DISTINCT {selected} FROM {table} WHERE {column} IS NOT NULL"), conn
+        )
+        add_filter_options(conn, table, distinct)
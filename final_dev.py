@@ -1,323 +1,439 @@
+import argparse
+import multiprocessing
 import os
-import pandas as pd
-import requests
 import urllib3
-import re
 import schedule
 import time
-from datetime import datetime
-from sqlalchemy import create_engine
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+from catalog import iter_catalog, load_catalog
+from fetch_engine import FetchEngine
+from filter_options import add_filter_options
+from key_pool import KeyPool
+from manufacturers import ManufacturerNormalizer
+from metrics import MetricsServer, RunMetrics, profile_run
+from mysql_loader import BulkLoader, advisory_lock, database_from_env, get_engine
+from oem_client import OEMSecretsClient
+from parquet_export import ParquetExporter
+from pipeline import clean_batch, iter_flat_batches
+from refresh import RefreshPlanner, tick_budget
+from response_cache import ResponseCache
+from rollups import add_to_rollups
+from schema import ensure_partitions, migrate, record_completed_run
+from sharding import ShardCheckpoints, delete_partial_rows, key_slice, select_shard, shard_path
+from snapshots import SnapshotWriter
 
 # Disable SSL warnings (only for debugging purposes)
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
-def pull_and_insert_data():
+# Started by the first run when METRICS_PORT is set, then kept for the process
+metrics_server = None
+
+# Tiers of REFRESH_MODE=priority, ranked by the first tick and kept for the process
+refresh_planner = None
+
+def prepare_database(engine, table):
+    """
+    Create/upgrade the managed table (keys, indexes, monthly partitions).
+    Shards in other processes or containers wait for each other here.
+    """
+    with advisory_lock(engine, f"{table}_migrate"):
+        migrate(engine, table)
+        ensure_partitions(engine, table)
+
+def pull_and_insert_data(shard_index=None, run_id=None, serve_metrics=True, parts=None):
     """
     This function pulls data from an Excel file (v2_All_products.xlsx),
     makes API calls to OEM Secrets, cleans and transforms the data,
     adds a DataPulledTime column, and inserts the result into MySQL.
+
+    With `shard_index`, only that shard of the catalog is processed, with
+    its slice of the API keys and the DataPulledTime shared by every shard
+    of `run_id` (see sharding.py). With `parts` (a set of part numbers),
+    only those catalog rows are looked up, always from the API (never resumed
+    from the response cache). Returns True when the run succeeded.
     """
+    global metrics_server
     print(f"[{datetime.now()}] Starting data pull...")
+    metrics = RunMetrics()
 
     # --------------------------------------------------------------------------
     # 1. Load environment variables
     # --------------------------------------------------------------------------
-    mysql_user = os.environ.get("MYSQL_USER", "root")
-    mysql_password = os.environ.get("MYSQL_PASSWORD", "12345***")
-    mysql_host = os.environ.get("MYSQL_HOST", "localhost")
-    mysql_port = os.environ.get("MYSQL_PORT", "3306")
-    mysql_database = os.environ.get("MYSQL_DATABASE", "productcatalog")
-    mysql_table = os.environ.get("MYSQL_TABLE", "productdetails")
+    connection_url, mysql_table = database_from_env()
+
+    # Insert strategy: executemany (chunked), multi (multi-row INSERT) or infile (LOAD DATA)
+    load_method = os.environ.get("LOAD_METHOD", "executemany")
+    load_chunksize = int(os.environ.get("LOAD_CHUNKSIZE", "5000"))
+
+    # "full" appends every row each run; "delta" only appends rows that changed
+    # since the last run and keeps <MYSQL_TABLE>_current up to date
+    snapshot_mode = os.environ.get("SNAPSHOT_MODE", "full")
+
+    # Keep the dashboard's daily price rollups up to date with every batch
+    rollups_enabled = os.environ.get("ROLLUPS", "1") == "1"
+
+    # Also append every run to a Parquet dataset partitioned by date and category ("" = off)
+    parquet_export_dir = os.environ.get("PARQUET_EXPORT_DIR", "")
 
     # Example: reading comma-separated API keys from a single variable
     api_keys_str = os.environ.get("API_KEYS", "")
     api_keys = [k.strip() for k in api_keys_str.split(",") if k.strip()]
 
+    # Number of parallel lookups and max requests/second per API key
+    fetch_concurrency = int(os.environ.get("FETCH_CONCURRENCY", "8"))
+    api_key_rate_limit = float(os.environ.get("API_KEY_RATE_LIMIT", "10"))
+    # Optional calls/day per key (0 = unknown) and where key state is kept between runs
+    api_key_daily_quota = int(os.environ.get("API_KEY_DAILY_QUOTA", "0"))
+    key_state_path = os.environ.get("KEY_STATE_PATH", "api_key_state.json")
+
+    # On-disk cache of raw API answers ("" disables it). Resume mode is for
+    # recovering an incomplete run: only parts without a fresh cache entry are
+    # fetched again, the others are re-inserted from the cache. Off by default,
+    # so a regular run never presents cached prices as a new snapshot.
+    cache_dir = os.environ.get("RESPONSE_CACHE_DIR", ".partsearch_cache")
+    cache_ttl_hours = float(os.environ.get("RESPONSE_CACHE_TTL_HOURS", "12"))
+    cache_max_mb = float(os.environ.get("RESPONSE_CACHE_MAX_MB", "512"))
+    resume = os.environ.get("RESUME_FROM_CACHE", "0") == "1"
+    if parts is not None:
+        # A refresh tick wants current prices: cached answers are hours old
+        resume = False
+
+    # Alias table used to canonicalize manufacturer names
+    manufacturer_aliases_path = os.environ.get("MANUFACTURER_ALIASES_PATH", "manufacturer_aliases.json")
+
+    # Rows flattened, cleaned and inserted per batch
+    batch_size = int(os.environ.get("BATCH_SIZE", "50000"))
+
+    # Sharded runs: number of shards and how parts are split (hash of the part
+    # number or whole categories). All shards of a run (by default: today's
+    # date) belong to one snapshot; a shard whose process has not renewed its
+    # lease for SHARD_LEASE_MINUTES may be taken over by another replica
+    shard_count = int(os.environ.get("SHARD_COUNT", "1"))
+    shard_by = os.environ.get("SHARD_BY", "hash")
+    shard_lease = timedelta(minutes=float(os.environ.get("SHARD_LEASE_MINUTES", "60")))
+    run_id = run_id or datetime.now().strftime("%Y-%m-%d")
+
+    # Per-run JSON performance report ("" = off) and Prometheus /metrics port (0 = off)
+    metrics_dir = os.environ.get("METRICS_DIR", "run_metrics")
+    metrics_port = int(os.environ.get("METRICS_PORT", "0"))
+    if serve_metrics and metrics_port and metrics_server is None:
+        metrics_server = MetricsServer(metrics_port)
+        print(f"Serving metrics on :{metrics_server.port}/metrics")
+    if metrics_server is not None:
+        metrics_server.metrics = metrics
+
     # --------------------------------------------------------------------------
-    # 2. Verify the Excel file exists
+    # 2. Open the catalog of parts
     # --------------------------------------------------------------------------
-    input_path = "v2_All_products.xlsx"
+    # Excel, CSV or Parquet (CATALOG_PATH points at another file, e.g. a generated one).
+    # A workbook is parsed once and then read from its Parquet copy in
+    # CATALOG_CACHE_DIR until it changes ("" parses it every run)
+    input_path = os.environ.get("CATALOG_PATH", "v2_All_products.xlsx")
+    catalog_cache_dir = os.environ.get("CATALOG_CACHE_DIR", ".catalog_cache")
     if not os.path.exists(input_path):
         raise FileNotFoundError(f"Input file not found: {input_path}")
 
-    # Read the Excel sheet
-    sheet_name = "Sheet1"
-    df = pd.read_excel(input_path, sheet_name=sheet_name)
-    df.columns = df.columns.str.strip()
+    # One timestamp (DataPulledTime) for every batch of this run
+    pulled_time = datetime.now()
+
+    checkpoints = None
+    if shard_index is not None:
+        try:
+            engine = get_engine(connection_url, local_infile=load_method == "infile")
+            prepare_database(engine, mysql_table)
+            checkpoints = ShardCheckpoints(engine, mysql_table)
+            # Every shard of the run writes the same DataPulledTime
+            pulled_time = checkpoints.start_run(run_id, shard_count, shard_by)
+            previous = checkpoints.status(run_id).get(shard_index)
+            if previous == "done":
+                print(f"Shard {shard_index}/{shard_count} of run {run_id} is already done, skipping.")
+                return True
+            # Splitting by category needs the whole catalog at hand
+            with metrics.stage("read_catalog"):
+                df = load_catalog(input_path, cache_dir=catalog_cache_dir)
+            metrics.add_rows("read_catalog", len(df))
+            df = select_shard(df, shard_count, shard_index, shard_by)
+            api_keys = key_slice(api_keys, shard_count, shard_index)
+        except Exception as e:
+            print(f"Error starting shard {shard_index} of run {run_id}: {e}")
+            return False
+        key_state_path = shard_path(key_state_path, shard_index)
+        print(f"Shard {shard_index}/{shard_count} of run {run_id}: {len(df)} parts, {len(api_keys)} API keys")
 
     # --------------------------------------------------------------------------
-    # 3. Make API calls to OEM Secrets
+    # 3. Make API calls to OEM Secrets (concurrently, rate-limited per key)
     # --------------------------------------------------------------------------
-    api_base_url = "https://oemsecretsapi.com/partsearch"
-
-    def get_part_info(part_number):
-        """
-        Cycles through API keys to fetch data for a given part_number.
-        Returns the JSON response if successful, otherwise None.
-        """
-        for api_key in api_keys:
-            url = f"{api_base_url}?apiKey={api_key}&searchTerm={part_number}&countryCode=DE&currency=EUR"
-            try:
-                response = requests.get(url, verify=False)
-                response.raise_for_status()
-                return response.json()
-            except requests.exceptions.HTTPError as http_err:
-                if response.status_code == 401:
-                    print(f"API key exhausted: {api_key}")
-                    continue
-                elif response.status_code in {400, 404}:
-                    print(f"No data for {part_number}: {http_err}")
-                    return None
-                else:
-                    print(f"HTTP error for {part_number}: {http_err}")
-                    return None
-            except requests.exceptions.RequestException as e:
-                print(f"Request error for {part_number}: {e}")
-                return None
-
-        print("All API keys exhausted.")
-        return None
+    # One pooled keep-alive session per run; 429/5xx are retried with backoff
+    client = OEMSecretsClient.from_env(pool_size=fetch_concurrency)
+    # Keys that are already known to be exhausted today are never tried again
+    key_pool = KeyPool(
+        api_keys,
+        rate_per_key=api_key_rate_limit,
+        daily_quota=api_key_daily_quota,
+        state_path=key_state_path,
+    )
+    cache = None
+    if cache_dir:
+        cache = ResponseCache(
+            cache_dir,
+            ttl_seconds=cache_ttl_hours * 3600,
+            max_bytes=cache_max_mb * 1024 * 1024,
+        )
+    fetcher = FetchEngine(
+        key_pool, concurrency=fetch_concurrency, client=client, cache=cache, resume=resume
+    )
     # --------------------------------------------------------------------------
-    # 4. Build a new DataFrame from the API response
+    # 4. Stream the API responses through flatten -> clean -> insert, one batch
+    #    at a time, so memory stays bounded however large the catalog is
     # --------------------------------------------------------------------------
-    columns = [
-        "Part_Number", "Categories", "Sub_Categories", "Sub_Categories2", "Category",
-        "Manufacturer", "Description", "Lead_time", "Lead_time_weeks", "Lead_time_format",
-        "Unit_break_QTY", "Unit_price_EUR", "Quantity_in_stock", "Factory_stock_quantity",
-        "On_order_quantity", "Partner_stock_quantity", "Distributor_name",
-        "Distributor_region", "Distributor_country", "Image_URL", "Buy_now_URL"
-    ]
-    new_data = []
-
-    for idx, row in df.iterrows():
-        part_number = row["Part_Number"]
-        categories = row["Categories"]
-        sub_categories = row["Sub_Categories"]
-        sub_categories2 = row["Sub_Categories2"]
-
-        # Fetch the JSON for the current part number
-        part_info = get_part_info(part_number)
-        if not part_info or "stock" not in part_info or not part_info["stock"]:
-            print(f"No data found for {part_number}")
-            continue
-
-        # Each "stock" entry may have multiple price breaks
-        for stock_info in part_info["stock"]:
-            prices = stock_info.get("prices", {})
-            if not isinstance(prices, dict):
-                print(f"Skipping entry due to unexpected 'prices' format: {prices}")
-                continue
-
-            price_list = prices.get("EUR", [])
-
-            manufacturer = stock_info.get("manufacturer", "N/A")
-            description = stock_info.get("description", "N/A")
-            category = stock_info.get("category", "N/A")
-            quantity_in_stock = stock_info.get("quantity_in_stock", "N/A")
-            factory_stock_quantity = stock_info.get("factory_stock_quantity", "N/A")
-            on_order_quantity = stock_info.get("on_order_quantity", "N/A")
-            partner_stock_quantity = stock_info.get("partner_stock_quantity", "N/A")
-            distributor_name = stock_info.get("distributor", {}).get("distributor_name", "N/A")
-            distributor_region = stock_info.get("distributor", {}).get("distributor_region", "N/A")
-            distributor_country = stock_info.get("distributor", {}).get("distributor_country", "N/A")
-            lead_time = stock_info.get("lead_time", "N/A")
-            lead_time_weeks = stock_info.get("lead_time_weeks", "N/A")
-            lead_time_format = stock_info.get("lead_time_format", "N/A")
-            image_url = stock_info.get("image_url", "N/A")
-            buy_now_url = stock_info.get("buy_now_url", "N/A")
-
-            # If there's a price list, iterate over each price break
-            if isinstance(price_list, list) and price_list:
-                for price in price_list:
-                    unit_break_qty = price.get("unit_break", "N/A")
-                    unit_price_eur = price.get("unit_price", "N/A")
-
-                    new_data.append([
-                        part_number, categories, sub_categories, sub_categories2, category,
-                        manufacturer, description, lead_time, lead_time_weeks, lead_time_format,
-                        unit_break_qty, unit_price_eur, quantity_in_stock, factory_stock_quantity,
-                        on_order_quantity, partner_stock_quantity, distributor_name,
-                        distributor_region, distributor_country, image_url, buy_now_url
-                    ])
-            else:
-                # No price data or empty list
-                unit_break_qty = "N/A"
-                unit_price_eur = "N/A"
-                new_data.append([
-                    part_number, categories, sub_categories, sub_categories2, category,
-                    manufacturer, description, lead_time, lead_time_weeks, lead_time_format,
-                    unit_break_qty, unit_price_eur, quantity_in_stock, factory_stock_quantity,
-                    on_order_quantity, partner_stock_quantity, distributor_name,
-                    distributor_region, distributor_country, image_url, buy_now_url
-                ])
-
-    # Create a new DataFrame
-    new_df = pd.DataFrame(new_data, columns=columns)
-    
-    # ------------------------------------------------------------------------------
-    # 7. Data Cleaning and Standardization
-    # ------------------------------------------------------------------------------
-    new_df["Manufacturer"] = new_df["Manufacturer"].str.lower()
-
-    name_mapping = {
-        "white-rodgers": "white-rodgers",
-        "whiterodgers": "white-rodgers",
-        "american power conversion": "american power conversion",
-        "american power conversion apc": "american power conversion",
-        "apex tool group mfr.": "apex tool group",
-        "apex tool group": "apex tool group",
-        "cal": "cal controls",
-        "cal controls": "cal controls",
-        "bud industries inc.": "bud industries",
-        "bud industries": "bud industries",
-        "bud": "bud industries",
-        "eaton hac": "eaton",
-        "eaton": "eaton",
-        "semikron danfoss": "semikron",
-        "semikron": "semikron",
-        "sick, inc.": "sick electronics",
-        "sick electronics": "sick electronics",
-        "tallysman": "tallysman",
-        "tallysman wireless": "tallysman",
-        "visaton": "visaton",
-        "visaton gmbh & co": "visaton",
-        "schneider electric-legacy relays": "schneider electric",
-        "schneider electric": "schneider electric",
-        "qualtek electronics": "qualtek electronics",
-        "qualtek electronics corp": "qualtek electronics",
-    }
-    new_df["Manufacturer"] = new_df["Manufacturer"].replace(name_mapping)
-    new_df["Manufacturer"] = new_df["Manufacturer"].str.split("/").str[0].str.strip()
-
-    def remove_suffixes(name):
-        pattern = r"\b(?:llc|inc|ltd|corporation|co|company|gmbh|s\.a|srl|plc|pvt|mfr|corp)\b\.?"
-        return re.sub(pattern, "", name, flags=re.IGNORECASE).strip()
-
-    new_df["Manufacturer"] = new_df["Manufacturer"].apply(remove_suffixes)
-    new_df["Manufacturer"] = new_df["Manufacturer"].str.replace(r"[^\w\s]", "", regex=True)
-    new_df["Manufacturer"] = new_df["Manufacturer"].str.replace(r"\s+", " ", regex=True).str.strip()
-
-    # Fill blanks with 0 for quantity columns
-    quantity_cols = [
-        "Quantity_in_stock",
-        "Factory_stock_quantity",
-        "On_order_quantity",
-        "Partner_stock_quantity"
-    ]
-    for col in quantity_cols:
-        new_df[col] = pd.to_numeric(new_df[col], errors="coerce").fillna(0).astype(int)
-
-    # Convert Unit_break_QTY to numeric
-    new_df["Unit_break_QTY"] = pd.to_numeric(new_df["Unit_break_QTY"], errors="coerce").fillna(0).astype(int)
-
-    # Convert Unit_price_EUR to numeric
-    new_df["Unit_price_EUR"] = pd.to_numeric(new_df["Unit_price_EUR"], errors="coerce").fillna(0)
-
-    # Convert lead time columns to lowercase
-    time_cols = ["Lead_time", "Lead_time_weeks", "Lead_time_format"]
-    for col in time_cols:
-        new_df[col] = new_df[col].astype(str).str.lower()
-
-    def calculate_new_lead_time(row):
-        """
-        Compute an integer-based "New_Lead_Time" (in days) 
-        from the lead_time, lead_time_weeks, and lead_time_format columns.
-        """
-        lead_time = row["Lead_time"]
-        lead_time_weeks = row["Lead_time_weeks"]
-        lead_time_format = row["Lead_time_format"]
-
-        def extract_number(text):
-            numbers = re.findall(r"\d+", text)
-            return int(numbers[0]) if numbers else 0
-
-        # If both lead_time_format and lead_time_weeks are known
-        if lead_time_format != "unknown" and lead_time_weeks != "unknown":
-            lead_time_numeric = extract_number(lead_time)
-            lead_time_weeks_numeric = extract_number(lead_time_weeks) * 7
-            if lead_time_format == "weeks":
-                return max(lead_time_numeric * 7, lead_time_weeks_numeric)
-            elif lead_time_format == "days":
-                return max(lead_time_numeric, lead_time_weeks_numeric)
-            else:
-                return 0
-
-        # If lead_time_weeks == "unknown" but lead_time_format != "unknown"
-        if lead_time_weeks == "unknown" and lead_time_format != "unknown":
-            if lead_time.strip() == "" or lead_time == "unknown":
-                return 0
-            else:
-                number = extract_number(lead_time)
-                if lead_time_format == "weeks":
-                    return number * 7
-                elif lead_time_format == "days":
-                    return number
+    if shard_index is not None:
+        chunks = [df]
+    else:
+        # Without shards the catalog is streamed in chunks, read as the fetch goes
+        chunks = metrics.timed_iter(
+            "read_catalog", iter_catalog(input_path, cache_dir=catalog_cache_dir), rows=len
+        )
+    if parts is not None:
+        chunks = (chunk[chunk["Part_Number"].astype(str).isin(parts)] for chunk in chunks)
+    catalog_rows = (row for chunk in chunks for row in chunk.itertuples(index=False, name=None))
+    # Results arrive in catalog order while the next parts are being fetched;
+    # "fetch" is the time the pipeline spends waiting for them
+    results = metrics.timed_iter("fetch", fetcher.fetch_all(catalog_rows, get_part_number=lambda r: r[0]))
+
+    manufacturers = ManufacturerNormalizer.from_file(manufacturer_aliases_path)
+
+    loader = None
+    exporter = None
+    if parquet_export_dir:
+        exporter = ParquetExporter(parquet_export_dir, pulled_time, shard=shard_index)
+    ok = False
+    attempt = None
+    try:
+        # LOAD DATA LOCAL INFILE is only enabled on the connections when it is used
+        engine = get_engine(connection_url, local_infile=load_method == "infile")
+        with metrics.stage("migrate"):
+            prepare_database(engine, mysql_table)
+        if checkpoints is not None:
+            # Atomic: a shard that is done or that a live replica is running is left alone
+            attempt = checkpoints.claim_shard(run_id, shard_index, lease=shard_lease)
+            if attempt is None:
+                print(f"Shard {shard_index}/{shard_count} of run {run_id} is done or running elsewhere, skipping.")
+                return True
+        if attempt is not None and attempt > 1:
+            # An earlier attempt of this shard did not finish: drop what it wrote
+            if snapshot_mode != "delta":
+                part_numbers = df["Part_Number"].dropna().astype(str).tolist()
+                deleted = delete_partial_rows(
+                    engine, mysql_table, pulled_time, part_numbers, rollups=rollups_enabled
+                )
+                print(f"Removed {deleted} rows of the earlier attempt of shard {shard_index}")
+            if exporter is not None:
+                exporter.remove_existing()
+        if snapshot_mode == "delta":
+            snapshots = SnapshotWriter(
+                engine, mysql_table, f"{mysql_table}_current",
+                method=load_method, chunksize=load_chunksize,
+            )
+            loader = snapshots.history
+        else:
+            snapshots = None
+            loader = BulkLoader(engine, mysql_table, method=load_method, chunksize=load_chunksize)
+        batches = iter_flat_batches(results, batch_size=batch_size)
+        for batch in metrics.timed_iter("flatten", batches, rows=len):
+            with metrics.stage("clean", rows=len(batch)):
+                new_df = clean_batch(batch, manufacturers, pulled_time, metrics=metrics)
+            # ------------------------------------------------------------------
+            # 5. Insert into MySQL (append, one transaction per batch). The
+            #    batch's rollups are committed with it, so they always match
+            #    the history rows (in delta mode: only the changed ones)
+            # ------------------------------------------------------------------
+            with metrics.stage("load", rows=len(new_df)), engine.begin() as conn:
+                if attempt is not None:
+                    # Rolls the batch back if another replica took the shard over
+                    checkpoints.heartbeat(run_id, shard_index, attempt, conn=conn)
+                if snapshots is not None:
+                    appended = snapshots.write(new_df, conn=conn)
                 else:
-                    return number * 7  # default assumption weeks
-
-        # If lead_time_format == "unknown" and lead_time_weeks != "unknown"
-        if lead_time_format == "unknown" and lead_time_weeks != "unknown":
-            number = extract_number(lead_time)
-            if "day" in lead_time:
-                return number
-            elif "week" in lead_time:
-                return number * 7
-            else:
-                return number * 7  # default assumption weeks
-
-        # If both are unknown
-        if lead_time_weeks == "unknown" and lead_time_format == "unknown":
-            number = extract_number(lead_time)
-            if "week" in lead_time:
-                return number * 7
-            elif "day" in lead_time:
-                return number
-            elif lead_time.isdigit():
-                return int(lead_time)
-            else:
-                return 0
-
-        return 0
-
-    new_df["New_Lead_Time"] = new_df.apply(calculate_new_lead_time, axis=1)
-
-    # Final columns order
-    final_columns = [
-        "Categories", "Sub_Categories", "Sub_Categories2", "Part_Number", "Manufacturer",
-        "Unit_break_QTY", "Unit_price_EUR", "Lead_time", "Lead_time_weeks", "Lead_time_format",
-        "Quantity_in_stock", "Factory_stock_quantity", "On_order_quantity", 
-        "Partner_stock_quantity", "Distributor_name", "Distributor_region", 
-        "Distributor_country", "Image_URL", "Buy_now_URL", "Category", 
-        "Description", "New_Lead_Time"
-    ]
-    new_df = new_df[final_columns]
+                    loader.write(new_df, conn=conn)
+                    appended = new_df
+                if rollups_enabled:
+                    with metrics.stage("rollups", rows=len(appended)):
+                        add_to_rollups(conn, mysql_table, appended)
+                # New values for the dashboard's sidebar filters
+                add_filter_options(conn, mysql_table, appended)
+            if exporter is not None:
+                with metrics.stage("parquet_export", rows=len(new_df)):
+                    exporter.write(new_df)
+            metrics.count("batches")
+            print(f"Processed batch of {len(new_df)} rows ({loader.rows} inserted so far)")
+        if snapshots is not None:
+            with metrics.stage("snapshot_cleanup"):
+                snapshots.remove_missing()
+        if attempt is not None:
+            checkpoints.finish_shard(run_id, shard_index, attempt, loader.rows)
+        # Only now may the dashboard cache what it reads of this snapshot
+        record_completed_run(engine, mysql_table, pulled_time, loader.rows, shard_index)
+        ok = True
+        print(f"Data inserted into MySQL database successfully at {datetime.now()}!")
+    except Exception as e:
+        # Responses fetched so far are in the cache; RESUME_FROM_CACHE=1 reuses them
+        metrics.count("errors")
+        print(f"Error pulling/inserting data into MySQL: {e}")
+        if attempt is not None:
+            checkpoints.fail_shard(run_id, shard_index, attempt, e)
+    finally:
+        client.close()
+        key_pool.save()
+        metrics.section("api", client.stats.summary())
+        metrics.section("api_keys", key_pool.summary())
+        print(f"API call stats: {client.stats.summary()}")
+        print(f"API key stats: {key_pool.summary()}")
+        if loader is not None:
+            metrics.section("insert", loader.summary())
+            print(f"Insert stats: {loader.summary()}")
+        if snapshot_mode == "delta" and loader is not None:
+            metrics.section("delta_snapshot", snapshots.summary())
+            print(f"Delta snapshot: {snapshots.summary()}")
+        if exporter is not None:
+            metrics.section("parquet_export", exporter.summary())
+            print(f"Parquet export: {exporter.summary()}")
+        if cache is not None:
+            metrics.section("response_cache", cache.summary())
+            print(f"Response cache: {cache.summary()}, evicted {cache.evict()} entries")
+        metrics.finish()
+        if metrics_dir:
+            suffix = f"-shard{shard_index}" if shard_index is not None else ""
+            print(f"Run metrics written to {metrics.write_json(metrics_dir, suffix=suffix)}")
+    return ok
+
+def run_ingest(run_id=None, shard_indexes=None):
+    """
+    One scheduled ingest. With SHARD_COUNT > 1 the shards listed in
+    SHARD_INDEX (comma-separated, default: all of them) run one after the
+    other, or in a pool of SHARD_WORKERS processes. Other replicas can run
+    the remaining shards of the same run. `run_id` (default: today's date)
+    and `shard_indexes` are set to retry the failed shards of an earlier run.
+    """
+    shard_count = int(os.environ.get("SHARD_COUNT", "1"))
+    if shard_count <= 1:
+        return pull_and_insert_data()
+
+    if not shard_indexes:
+        shard_indexes = [int(i) for i in os.environ.get("SHARD_INDEX", "").split(",") if i.strip()]
+    shard_indexes = shard_indexes or list(range(shard_count))
+    shard_workers = int(os.environ.get("SHARD_WORKERS", "1"))
+    run_id = run_id or datetime.now().strftime("%Y-%m-%d")
+
+    # Migrate once up front instead of in every shard at the same time
+    connection_url, mysql_table = database_from_env()
+    try:
+        prepare_database(get_engine(connection_url), mysql_table)
+    except Exception as e:
+        print(f"Error preparing the database for run {run_id}: {e}")
+        return False
+
+    results = {}
+    if shard_workers <= 1:
+        for shard_index in shard_indexes:
+            results[shard_index] = pull_and_insert_data(shard_index, run_id)
+    else:
+        # "spawn" so no worker inherits the parent's database connections
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=shard_workers, mp_context=context) as pool:
+            futures = {i: pool.submit(pull_and_insert_data, i, run_id, False) for i in shard_indexes}
+            for shard_index, future in futures.items():
+                try:
+                    results[shard_index] = future.result()
+                except Exception as e:
+                    print(f"Shard {shard_index} failed: {e}")
+                    results[shard_index] = False
+
+    failed = [i for i, ok in results.items() if not ok]
+    print(f"Run {run_id}: {len(results) - len(failed)} of {len(results)} shards done")
+    if failed:
+        print(f"Retry the failed shards with: python final_dev.py --run-id {run_id} "
+              f"--shards {','.join(map(str, failed))}")
+    return not failed
+
+def run_refresh():
+    """
+    One tick of REFRESH_MODE=priority: refreshes the parts that are due
+    (see refresh.py), as many as this tick's share of the remaining daily
+    API budget allows.
+    """
+    global refresh_planner
+    connection_url, mysql_table = database_from_env()
 
-    # --------------------------------------------------------------------------
-    # 6. Add Timestamp Column (DataPulledTime)
-    # --------------------------------------------------------------------------
-    new_df["DataPulledTime"] = datetime.now()
-    # --------------------------------------------------------------------------
-    # 7. Insert into MySQL (append)
-    # --------------------------------------------------------------------------
-    connection_url = f"mysql+pymysql://{mysql_user}:{mysql_password}@{mysql_host}:{mysql_port}/{mysql_database}"
+    # Calls/day for the refresh; default: the daily quota of all keys (0 = no limit)
+    api_keys = [k.strip() for k in os.environ.get("API_KEYS", "").split(",") if k.strip()]
+    api_key_daily_quota = int(os.environ.get("API_KEY_DAILY_QUOTA", "0"))
+    daily_budget = int(os.environ.get("REFRESH_DAILY_BUDGET", "0")) or api_key_daily_quota * len(api_keys)
+    tick = timedelta(minutes=int(os.environ.get("REFRESH_TICK_MINUTES", "15")))
+
+    # A failed tick is logged and the next one tries again; it never stops the scheduler
     try:
-        engine = create_engine(connection_url)
-        new_df.to_sql(name=mysql_table, con=engine, if_exists="append", index=False)
-        print(f"Data inserted into MySQL database successfully at {datetime.now()}!")
+        engine = get_engine(connection_url)
+        prepare_database(engine, mysql_table)
+        if refresh_planner is None:
+            refresh_planner = RefreshPlanner.from_env(engine, mysql_table)
+
+        # Replicas take turns, so a part is never picked by two of them
+        with advisory_lock(engine, f"{mysql_table}_refresh"):
+            now = datetime.now()
+            catalog = load_catalog(
+                os.environ.get("CATALOG_PATH", "v2_All_products.xlsx"),
+                cache_dir=os.environ.get("CATALOG_CACHE_DIR", ".catalog_cache"),
+            )
+            key_pool = KeyPool(api_keys, daily_quota=api_key_daily_quota,
+                               state_path=os.environ.get("KEY_STATE_PATH", "api_key_state.json"))
+            budget = tick_budget(daily_budget, key_pool.summary()["calls"], now, tick)
+            due = refresh_planner.due_parts(catalog["Part_Number"], now, budget)
+            print(f"[{now}] Refresh: {len(due)} parts due (budget {budget if budget is not None else 'unlimited'})")
+            if not due:
+                return True
+            ok = pull_and_insert_data(parts=set(due))
+            if ok:
+                refresh_planner.mark_refreshed(due, now)
+        return ok
     except Exception as e:
-        print(f"Error inserting data into MySQL: {e}")
+        print(f"Error in refresh tick: {e}")
+        return False
 
 # ------------------------------------------------------------------------------
-# Scheduling: run pull_and_insert_data() once per day at HH:MM and keep alive
+# Scheduling: run the ingest once per day at HH:MM (or refresh due parts
+# every few minutes) and keep alive.
+# Importing this module (e.g. from benchmarks/bench_ingest.py) does not start it.
 # ------------------------------------------------------------------------------
-schedule.every().day.at("21:30").do(pull_and_insert_data)
-
-print("Scheduler started. The script will run 'pull_and_insert_data()' daily at 21:30.")
-
-# Optional: run immediately on container startup (uncomment if desired)
-pull_and_insert_data()
-
-# Keep the container running, checking for tasks every minute
-while True:
-    schedule.run_pending()
-    time.sleep(60)
\ No newline at end of file
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pull the parts catalog from OEM Secrets on a schedule.")
+    parser.add_argument("--run-id", default="", help="retry the shards of this earlier run once, then exit")
+    parser.add_argument("--shards", default="", help="comma-separated shards to retry (default: SHARD_INDEX or all)")
+    args = parser.parse_args()
+    if args.run_id:
+        shards = [int(i) for i in args.shards.split(",") if i.strip()]
+        raise SystemExit(0 if run_ingest(run_id=args.run_id, shard_indexes=shards) else 1)
+
+    # "daily" pulls the whole catalog at 21:30; "priority" refreshes the parts
+    # that are due every REFRESH_TICK_MINUTES, hot parts hourly, static ones weekly
+    refresh_mode = os.environ.get("REFRESH_MODE", "daily")
+    if refresh_mode == "priority":
+        run_scheduled = run_refresh
+        tick_minutes = int(os.environ.get("REFRESH_TICK_MINUTES", "15"))
+        schedule.every(tick_minutes).minutes.do(run_refresh)
+        print(f"Scheduler started. The script will refresh due parts every {tick_minutes} minutes.")
+    else:
+        run_scheduled = run_ingest
+        schedule.every().day.at("21:30").do(run_ingest)
+        print("Scheduler started. The script will run 'pull_and_insert_data()' daily at 21:30.")
+
+    # Optional: run immediately on container startup (uncomment if desired).
+    # With PROFILE_PATH set, this first run is profiled with cProfile.
+    with profile_run(os.environ.get("PROFILE_PATH", "")):
+        run_scheduled()
+
+    # Keep the container running, checking for tasks every minute
+    while True:
+        schedule.run_pending()
+        time.sleep(60)
\ No newline at end of file
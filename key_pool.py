@@ -0,0 +1,185 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import date
+
+
+class KeyRateLimiter:
+    """
+    Spaces out requests made with a single API key so that no more than
+    `rate` calls per second are sent with it, no matter how many worker
+    threads share the key. A rate of 0 disables the limit.
+    """
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate and rate > 0 else 0.0
+        self._lock = threading.Lock()
+        self.next_slot = 0.0
+
+    def reserve(self):
+        """
+        Books the next free slot and returns how long to sleep until it.
+        """
+        if not self.interval:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        return slot - now
+
+    def wait(self):
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+
+def key_id(api_key):
+    """
+    Short, stable identifier for a key so secrets never land on disk.
+    """
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+
+
+class KeyPool:
+    """
+    Shared scheduler for the OEM Secrets API keys.
+
+    Remembers which keys answered 401 today and how many calls each key
+    has made, so no request is wasted on a key that is already known to
+    be dead. Every acquire() hands out the live key that can be used the
+    soonest (rate limit) and has the most quota left, which spreads the
+    load evenly. The state is kept in a small JSON file and starts fresh
+    when the date changes.
+    """
+
+    def __init__(self, api_keys, rate_per_key=10.0, daily_quota=0, state_path=None):
+        self.api_keys = list(dict.fromkeys(api_keys))
+        self.daily_quota = int(daily_quota or 0)
+        self.state_path = state_path
+        self.limiters = {api_key: KeyRateLimiter(rate_per_key) for api_key in self.api_keys}
+        self._lock = threading.Lock()
+        self.day = date.today().isoformat()
+        self.state = {api_key: self._fresh_state() for api_key in self.api_keys}
+        self.rotations = 0
+        self.load()
+
+    @staticmethod
+    def _fresh_state():
+        return {"exhausted": False, "used": 0, "remaining": None}
+
+    def _reset_if_new_day(self):
+        today = date.today().isoformat()
+        if today != self.day:
+            self.day = today
+            self.state = {api_key: self._fresh_state() for api_key in self.api_keys}
+
+    def remaining(self, api_key):
+        """
+        Calls left on a key today, or None when the quota is unknown.
+        """
+        state = self.state[api_key]
+        if state["remaining"] is not None:
+            return state["remaining"]
+        if self.daily_quota:
+            return max(0, self.daily_quota - state["used"])
+        return None
+
+    def is_available(self, api_key):
+        return not self.state[api_key]["exhausted"] and self.remaining(api_key) != 0
+
+    def acquire(self, exclude=()):
+        """
+        Picks the best live key that is not in `exclude`, waits for its
+        rate-limit slot and returns it. Returns None when no key is left.
+        """
+        with self._lock:
+            self._reset_if_new_day()
+            candidates = [k for k in self.api_keys if k not in exclude and self.is_available(k)]
+            if not candidates:
+                return None
+            now = time.monotonic()
+
+            def score(api_key):
+                remaining = self.remaining(api_key)
+                return (
+                    max(now, self.limiters[api_key].next_slot),
+                    -(remaining if remaining is not None else float("inf")),
+                    self.state[api_key]["used"],
+                )
+
+            api_key = min(candidates, key=score)
+            delay = self.limiters[api_key].reserve()
+        if delay > 0:
+            time.sleep(delay)
+        return api_key
+
+    def wait(self, api_key):
+        """
+        Waits for the key's next rate-limit slot, e.g. before a retry.
+        """
+        self.limiters[api_key].wait()
+
+    def record_use(self, api_key, response=None):
+        """
+        Counts one request sent with a key (every retry counts) and picks
+        up the quota the API reports, if it sends a rate-limit header.
+        """
+        with self._lock:
+            state = self.state[api_key]
+            state["used"] += 1
+            header = response.headers.get("X-RateLimit-Remaining") if response is not None else None
+            if header is not None:
+                try:
+                    state["remaining"] = max(0, int(header))
+                except ValueError:
+                    pass
+            elif state["remaining"] is not None:
+                state["remaining"] = max(0, state["remaining"] - 1)
+
+    def mark_exhausted(self, api_key):
+        with self._lock:
+            if not self.state[api_key]["exhausted"]:
+                self.state[api_key]["exhausted"] = True
+                self.rotations += 1
+                print(f"API key exhausted: {key_id(api_key)}")
+
+    def summary(self):
+        with self._lock:
+            return {
+                "keys": len(self.api_keys),
+                "exhausted": sum(1 for s in self.state.values() if s["exhausted"]),
+                "rotations": self.rotations,
+                "calls": sum(s["used"] for s in self.state.values()),
+            }
+
+    def load(self):
+        if not self.state_path or not os.path.exists(self.state_path):
+            return
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable key state {self.state_path}: {e}")
+            return
+        if saved.get("date") != self.day:
+            return
+        saved_keys = saved.get("keys", {})
+        for api_key in self.api_keys:
+            if key_id(api_key) in saved_keys:
+                self.state[api_key].update(saved_keys[key_id(api_key)])
+
+    def save(self):
+        if not self.state_path:
+            return
+        with self._lock:
+            payload = {
+                "date": self.day,
+                "keys": {key_id(k): dict(s) for k, s in self.state.items()},
+            }
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(payload, f, indent=2)
+        os.replace(tmp_path, self.state_path)
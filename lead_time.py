@@ -0,0 +1,139 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+
+def extract_number(text):
+    numbers = re.findall(r"\d+", text)
+    return int(numbers[0]) if numbers else 0
+
+
+def calculate_new_lead_time(row):
+    """
+    Compute an integer-based "New_Lead_Time" (in days)
+    from the lead_time, lead_time_weeks, and lead_time_format columns.
+
+    Row-wise reference implementation; compute_new_lead_time() gives the
+    same result for a whole DataFrame at once.
+    """
+    lead_time = row["Lead_time"]
+    lead_time_weeks = row["Lead_time_weeks"]
+    lead_time_format = row["Lead_time_format"]
+
+    # If both lead_time_format and lead_time_weeks are known
+    if lead_time_format != "unknown" and lead_time_weeks != "unknown":
+        lead_time_numeric = extract_number(lead_time)
+        lead_time_weeks_numeric = extract_number(lead_time_weeks) * 7
+        if lead_time_format == "weeks":
+            return max(lead_time_numeric * 7, lead_time_weeks_numeric)
+        elif lead_time_format == "days":
+            return max(lead_time_numeric, lead_time_weeks_numeric)
+        else:
+            return 0
+
+    # If lead_time_weeks == "unknown" but lead_time_format != "unknown"
+    if lead_time_weeks == "unknown" and lead_time_format != "unknown":
+        if lead_time.strip() == "" or lead_time == "unknown":
+            return 0
+        else:
+            number = extract_number(lead_time)
+            if lead_time_format == "weeks":
+                return number * 7
+            elif lead_time_format == "days":
+                return number
+            else:
+                return number * 7  # default assumption weeks
+
+    # If lead_time_format == "unknown" and lead_time_weeks != "unknown"
+    if lead_time_format == "unknown" and lead_time_weeks != "unknown":
+        number = extract_number(lead_time)
+        if "day" in lead_time:
+            return number
+        elif "week" in lead_time:
+            return number * 7
+        else:
+            return number * 7  # default assumption weeks
+
+    # If both are unknown
+    if lead_time_weeks == "unknown" and lead_time_format == "unknown":
+        number = extract_number(lead_time)
+        if "week" in lead_time:
+            return number * 7
+        elif "day" in lead_time:
+            return number
+        elif lead_time.isdigit():
+            return int(lead_time)
+        else:
+            return 0
+
+    return 0
+
+
+def _per_value(codes, uniques, func, dtype):
+    """
+    Evaluates func once per distinct value of a factorized string column
+    and spreads the results back over all rows. Lead-time texts repeat a
+    lot, so this is far cheaper than running the regex on every row.
+    """
+    values = np.fromiter((func(u) for u in uniques), dtype=dtype, count=len(uniques))
+    return values[codes]
+
+
+def compute_new_lead_time(df):
+    """
+    Vectorized New_Lead_Time (in days) for a DataFrame whose Lead_time,
+    Lead_time_weeks and Lead_time_format columns are lowercase strings.
+    Returns an int64 Series equal to df.apply(calculate_new_lead_time, axis=1).
+    """
+    if df.empty:
+        return pd.Series([], index=df.index, dtype="int64")
+
+    lt_codes, lt_values = pd.factorize(df["Lead_time"], sort=False)
+    wk_codes, wk_values = pd.factorize(df["Lead_time_weeks"], sort=False)
+    fmt_codes, fmt_values = pd.factorize(df["Lead_time_format"], sort=False)
+
+    lead_num = _per_value(lt_codes, lt_values, extract_number, np.int64)
+    has_day = _per_value(lt_codes, lt_values, lambda t: "day" in t, bool)
+    has_week = _per_value(lt_codes, lt_values, lambda t: "week" in t, bool)
+    is_digit = _per_value(lt_codes, lt_values, str.isdigit, bool)
+    is_blank = _per_value(lt_codes, lt_values, lambda t: t.strip() == "" or t == "unknown", bool)
+
+    weeks_num = _per_value(wk_codes, wk_values, extract_number, np.int64) * 7
+    weeks_known = _per_value(wk_codes, wk_values, lambda t: t != "unknown", bool)
+
+    fmt_known = _per_value(fmt_codes, fmt_values, lambda t: t != "unknown", bool)
+    fmt_weeks = _per_value(fmt_codes, fmt_values, lambda t: t == "weeks", bool)
+    fmt_days = _per_value(fmt_codes, fmt_values, lambda t: t == "days", bool)
+
+    both_known = fmt_known & weeks_known
+    weeks_unknown = fmt_known & ~weeks_known
+    format_unknown = ~fmt_known & weeks_known
+    both_unknown = ~fmt_known & ~weeks_known
+
+    conditions = [
+        both_known & fmt_weeks,
+        both_known & fmt_days,
+        both_known,
+        weeks_unknown & is_blank,
+        weeks_unknown & fmt_days,
+        weeks_unknown,
+        format_unknown & has_day,
+        format_unknown,
+        both_unknown & has_week,
+        both_unknown & (has_day | is_digit),
+    ]
+    choices = [
+        np.maximum(lead_num * 7, weeks_num),
+        np.maximum(lead_num, weeks_num),
+        0,
+        0,
+        lead_num,
+        lead_num * 7,
+        lead_num,
+        lead_num * 7,
+        lead_num * 7,
+        lead_num,
+    ]
+    result = np.select(conditions, choices, default=0).astype(np.int64)
+    return pd.Series(result, index=df.index, name="New_Lead_Time")
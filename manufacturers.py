@@ -0,0 +1,65 @@
+import json
+import re
+
+import numpy as np
+import pandas as pd
+
+SUFFIX_PATTERN = re.compile(
+    r"\b(?:llc|inc|ltd|corporation|co|company|gmbh|s\.a|srl|plc|pvt|mfr|corp)\b\.?", re.IGNORECASE
+)
+PUNCTUATION_PATTERN = re.compile(r"[^\w\s]")
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+def load_aliases(path):
+    """
+    Reads the manufacturer alias table, a JSON object of
+    {"raw name (lowercase)": "canonical name"}.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        aliases = json.load(f)
+    return {str(alias).lower(): canonical for alias, canonical in aliases.items()}
+
+
+class ManufacturerNormalizer:
+    """
+    Canonicalizes manufacturer names: lowercase, alias table, keep the part
+    before "/", drop legal suffixes (inc, gmbh, ...), strip punctuation and
+    collapse whitespace.
+
+    There are only a few hundred distinct raw names against hundreds of
+    thousands of rows, so each distinct value is normalized once, memoized,
+    and mapped back onto the rows through pd.factorize codes.
+    """
+
+    def __init__(self, aliases):
+        self.aliases = aliases
+        self.memo = {}
+
+    @classmethod
+    def from_file(cls, path):
+        return cls(load_aliases(path))
+
+    def normalize_one(self, raw):
+        if not isinstance(raw, str):
+            return np.nan
+        if raw in self.memo:
+            return self.memo[raw]
+        name = raw.lower()
+        name = self.aliases.get(name, name)
+        name = name.split("/")[0].strip()
+        name = SUFFIX_PATTERN.sub("", name).strip()
+        name = PUNCTUATION_PATTERN.sub("", name)
+        name = WHITESPACE_PATTERN.sub(" ", name).strip()
+        self.memo[raw] = name
+        return name
+
+    def normalize(self, series):
+        """
+        Returns a new Series of canonical names aligned with `series`.
+        Missing or non-text values come back as NaN.
+        """
+        codes, uniques = pd.factorize(series, sort=False)
+        canonical = np.array([self.normalize_one(u) for u in uniques] + [np.nan], dtype=object)
+        # Code -1 (missing) picks the trailing NaN
+        return pd.Series(canonical[codes], index=series.index, name=series.name)
@@ -0,0 +1,234 @@
+"""
+Per-run instrumentation of the ingest pipeline.
+
+RunMetrics times every stage (read, fetch, flatten, clean, load, ...),
+counts the rows each one produced and collects the summaries of the API
+client, key pool, cache and loader into one JSON report per run. Nested
+stages are reported as self time, so e.g. "flatten" does not include the
+time spent waiting for "fetch" results it pulls from.
+
+MetricsServer optionally exposes the current run's numbers in the
+Prometheus text format; profile_run() wraps one run in cProfile.
+"""
+import cProfile
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+METRIC_PREFIX = "partsearch"
+
+
+def peak_rss_bytes():
+    """
+    Peak resident set size of this process, or None where unavailable.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class RunMetrics:
+    def __init__(self):
+        self.started_at = datetime.now()
+        self.finished_at = None
+        self._start = time.perf_counter()
+        self._end = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.stages = {}
+        self.counters = {}
+        self.sections = {}
+
+    def _stage(self, name):
+        return self.stages.setdefault(name, {"seconds": 0.0, "calls": 0, "rows": 0})
+
+    @contextmanager
+    def stage(self, name, rows=0):
+        """
+        Times the enclosed block as `name` (self time, nested stages excluded).
+        """
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        frame = [time.perf_counter(), 0.0]
+        stack.append(frame)
+        try:
+            yield
+        finally:
+            stack.pop()
+            elapsed = time.perf_counter() - frame[0]
+            if stack:
+                stack[-1][1] += elapsed
+            with self._lock:
+                stage = self._stage(name)
+                stage["seconds"] += elapsed - frame[1]
+                stage["calls"] += 1
+                stage["rows"] += rows
+
+    def add_rows(self, name, rows):
+        with self._lock:
+            self._stage(name)["rows"] += rows
+
+    def timed_iter(self, name, iterable, rows=lambda item: 1):
+        """
+        Yields from `iterable`, timing every step as stage `name` and
+        counting rows(item) per item.
+        """
+        iterator = iter(iterable)
+        while True:
+            with self.stage(name):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            self.add_rows(name, rows(item))
+            yield item
+
+    def count(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def section(self, name, summary):
+        """
+        Attaches a component summary (dict), e.g. the API latency stats.
+        """
+        with self._lock:
+            self.sections[name] = summary
+
+    def finish(self):
+        self.finished_at = datetime.now()
+        self._end = time.perf_counter()
+
+    def report(self):
+        with self._lock:
+            stages = {
+                name: {
+                    "seconds": round(s["seconds"], 3),
+                    "calls": s["calls"],
+                    "rows": s["rows"],
+                    "rows_per_second": round(s["rows"] / s["seconds"], 1) if s["seconds"] else 0.0,
+                }
+                for name, s in self.stages.items()
+            }
+            counters = dict(self.counters)
+            sections = dict(self.sections)
+        rss = peak_rss_bytes()
+        return {
+            "started_at": self.started_at.isoformat(timespec="seconds"),
+            "finished_at": self.finished_at.isoformat(timespec="seconds") if self.finished_at else None,
+            "total_seconds": round((self._end or time.perf_counter()) - self._start, 3),
+            "peak_rss_mb": round(rss / 1024 / 1024, 1) if rss is not None else None,
+            "stages": stages,
+            "counters": counters,
+            **sections,
+        }
+
+    def write_json(self, directory, suffix=""):
+        """
+        Writes the report to <directory>/run-<started_at><suffix>.json and returns the path.
+        """
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"run-{self.started_at:%Y%m%dT%H%M%S}{suffix}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=2, default=str)
+        return path
+
+    def prometheus_text(self):
+        """
+        The report in the Prometheus text exposition format.
+        """
+        report = self.report()
+        lines = []
+
+        def metric(name, value, labels=None):
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                return
+            label_text = ""
+            if labels:
+                label_text = "{" + ",".join(f'{k}="{v}"' for k, v in labels.items()) + "}"
+            lines.append(f"{METRIC_PREFIX}_{name}{label_text} {value}")
+
+        metric("run_seconds", report["total_seconds"])
+        metric("peak_rss_bytes", peak_rss_bytes())
+        for stage, values in report["stages"].items():
+            for field in ("seconds", "calls", "rows", "rows_per_second"):
+                metric(f"stage_{field}", values[field], {"stage": stage})
+        for name, value in report["counters"].items():
+            metric(name, value)
+        for section, summary in report.items():
+            if isinstance(summary, dict) and section not in ("stages", "counters"):
+                for field, value in summary.items():
+                    metric(f"{section}_{field}", value)
+        return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    """
+    Serves /metrics for the most recent RunMetrics (set `.metrics`) from a
+    daemon thread, so a Prometheus scraper can follow a run while it goes.
+    """
+
+    def __init__(self, port, host="0.0.0.0"):
+        self.metrics = None
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = (server.metrics.prometheus_text() if server.metrics else "").encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.port = self.httpd.server_address[1]
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def timed(metrics, name, rows=0):
+    """
+    metrics.stage(name, rows), or a no-op when no metrics are collected.
+    """
+    return metrics.stage(name, rows) if metrics is not None else nullcontext()
+
+
+@contextmanager
+def profile_run(path):
+    """
+    Profiles the enclosed block with cProfile and dumps the stats to `path`
+    (open with `python -m pstats <path>` or snakeviz). No-op when path is "".
+    """
+    if not path:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
+        print(f"Profile written to {path}")
@@ -0,0 +1,191 @@
+import csv
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.types import BigInteger, DateTime, Float, Integer, String, Text
+
+# Explicit column types for the productdetails table, used when the loader
+# creates it instead of letting pandas guess TEXT for every string
+COLUMN_TYPES = {
+    "Categories": String(255),
+    "Sub_Categories": String(255),
+    "Sub_Categories2": String(255),
+    "Part_Number": String(128),
+    "Manufacturer": String(255),
+    "Unit_break_QTY": Integer(),
+    "Unit_price_EUR": Float(precision=53),
+    "Lead_time": String(64),
+    "Lead_time_weeks": String(64),
+    "Lead_time_format": String(32),
+    "Quantity_in_stock": BigInteger(),
+    "Factory_stock_quantity": BigInteger(),
+    "On_order_quantity": BigInteger(),
+    "Partner_stock_quantity": BigInteger(),
+    "Distributor_name": String(255),
+    "Distributor_region": String(128),
+    "Distributor_country": String(64),
+    "Image_URL": Text(),
+    "Buy_now_URL": Text(),
+    "Category": String(255),
+    "Description": Text(),
+    "New_Lead_Time": Integer(),
+    "DataPulledTime": DateTime(),
+}
+
+# SQLite refuses statements with more bound parameters than this
+SQLITE_MAX_VARIABLES = 32766
+
+_engines = {}
+
+
+def database_from_env():
+    """
+    (connection URL, table) from the MYSQL_* settings.
+    """
+    mysql_user = os.environ.get("MYSQL_USER", "root")
+    mysql_password = os.environ.get("MYSQL_PASSWORD", "12345***")
+    mysql_host = os.environ.get("MYSQL_HOST", "localhost")
+    mysql_port = os.environ.get("MYSQL_PORT", "3306")
+    mysql_database = os.environ.get("MYSQL_DATABASE", "productcatalog")
+    mysql_table = os.environ.get("MYSQL_TABLE", "productdetails")
+    # Full SQLAlchemy URL override (e.g. sqlite:///local.db for local runs)
+    database_url = os.environ.get("DATABASE_URL", "")
+    connection_url = database_url or (
+        f"mysql+pymysql://{mysql_user}:{mysql_password}@{mysql_host}:{mysql_port}/{mysql_database}"
+    )
+    return connection_url, mysql_table
+
+
+def get_engine(connection_url, local_infile=False):
+    """
+    Returns one shared engine per connection URL, so the scheduler reuses
+    its connection pool between runs instead of building a new one.
+
+    `local_infile` lets the server read files from this machine and is
+    only needed by BulkLoader's "infile" method, so it is off by default.
+    """
+    key = (connection_url, local_infile)
+    if key not in _engines:
+        connect_args = {}
+        if local_infile and connection_url.startswith("mysql+pymysql"):
+            connect_args["local_infile"] = True
+        _engines[key] = create_engine(
+            connection_url, pool_pre_ping=True, pool_recycle=3600, connect_args=connect_args
+        )
+    return _engines[key]
+
+
+@contextmanager
+def advisory_lock(engine, name, timeout=600):
+    """
+    MySQL named lock (GET_LOCK) held for the enclosed block, so shards
+    running in other processes or containers take turns on shared steps
+    such as migrations. A no-op on other databases.
+    """
+    if engine.dialect.name != "mysql":
+        yield
+        return
+    with engine.connect() as conn:
+        if not conn.execute(text("SELECT GET_LOCK(:name, :timeout)"), {"name": name, "timeout": timeout}).scalar():
+            raise TimeoutError(f"Could not acquire lock {name} within {timeout} s")
+        try:
+            yield
+        finally:
+            conn.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": name})
+
+
+class BulkLoader:
+    """
+    Appends cleaned batches to a table, one transaction per batch.
+
+    method:
+      "executemany" - chunked INSERTs through the driver's executemany
+                      (PyMySQL rewrites these into multi-row INSERTs)
+      "multi"       - chunked multi-row INSERT statements built by pandas
+      "infile"      - MySQL only: write the batch to a CSV file and load it
+                      with LOAD DATA LOCAL INFILE
+    """
+
+    def __init__(self, engine, table, method="executemany", chunksize=5000):
+        if method not in {"executemany", "multi", "infile"}:
+            raise ValueError(f"Unknown load method: {method}")
+        if method == "infile" and engine.dialect.name != "mysql":
+            raise ValueError("LOAD DATA LOCAL INFILE is only available on MySQL")
+        self.engine = engine
+        self.table = table
+        self.method = method
+        self.chunksize = max(1, int(chunksize))
+        self.rows = 0
+        self.seconds = 0.0
+
+    def _chunksize(self, df):
+        if self.method == "multi" and self.engine.dialect.name == "sqlite":
+            return max(1, min(self.chunksize, SQLITE_MAX_VARIABLES // max(1, len(df.columns))))
+        return self.chunksize
+
+    def write(self, df, conn=None):
+        """
+        Inserts one DataFrame inside a single transaction: either the whole
+        batch lands or none of it does. With `conn`, the rows go into the
+        caller's open transaction instead.
+        """
+        if df.empty:
+            return
+        start = time.perf_counter()
+        if conn is None:
+            with self.engine.begin() as conn:
+                self._insert(conn, df)
+        else:
+            self._insert(conn, df)
+        self.seconds += time.perf_counter() - start
+        self.rows += len(df)
+
+    def _insert(self, conn, df):
+        if self.method == "infile":
+            self._load_infile(conn, df)
+        else:
+            df.to_sql(
+                name=self.table,
+                con=conn,
+                if_exists="append",
+                index=False,
+                dtype={c: t for c, t in COLUMN_TYPES.items() if c in df.columns},
+                chunksize=self._chunksize(df),
+                method="multi" if self.method == "multi" else None,
+            )
+
+    def _load_infile(self, conn, df):
+        # Create the table with the explicit types on the first load
+        df.head(0).to_sql(
+            name=self.table,
+            con=conn,
+            if_exists="append",
+            index=False,
+            dtype={c: t for c, t in COLUMN_TYPES.items() if c in df.columns},
+        )
+        fd, csv_path = tempfile.mkstemp(suffix=".csv")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+                df.to_csv(f, index=False, header=False, na_rep="NULL",
+                          quoting=csv.QUOTE_MINIMAL, lineterminator="\n")
+            column_list = ", ".join(f"`{c}`" for c in df.columns)
+            conn.exec_driver_sql(
+                f"LOAD DATA LOCAL INFILE '{csv_path}' INTO TABLE `{self.table}` "
+                "CHARACTER SET utf8mb4 "
+                "FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' ESCAPED BY '' "
+                f"LINES TERMINATED BY '\\n' ({column_list})"
+            )
+        finally:
+            os.remove(csv_path)
+
+    def summary(self):
+        rate = self.rows / self.seconds if self.seconds else 0.0
+        return {
+            "method": self.method,
+            "rows": self.rows,
+            "seconds": round(self.seconds, 3),
+            "rows_per_second": round(rate, 1),
+        }
@@ -0,0 +1,169 @@
+import os
+import random
+import threading
+import time
+from collections import deque
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Base URL of the OEM Secrets partsearch endpoint (overridable for local mocks)
+API_BASE_URL = os.environ.get("OEM_API_BASE_URL", "https://oemsecretsapi.com/partsearch")
+
+# Status codes that are worth retrying after a short wait
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class LatencyStats:
+    """
+    Thread-safe counters for partsearch calls. Keeps the most recent
+    `max_samples` latencies (seconds) so percentiles can be reported.
+    """
+
+    def __init__(self, max_samples=100000):
+        self._lock = threading.Lock()
+        self.samples = deque(maxlen=max_samples)
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def record(self, seconds):
+        with self._lock:
+            self.requests += 1
+            self.total_seconds += seconds
+            self.max_seconds = max(self.max_seconds, seconds)
+            self.samples.append(seconds)
+
+    def record_retry(self):
+        with self._lock:
+            self.retries += 1
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+
+    def percentile(self, pct):
+        with self._lock:
+            ordered = sorted(self.samples)
+        if not ordered:
+            return 0.0
+        index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def summary(self):
+        mean = self.total_seconds / self.requests if self.requests else 0.0
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "failures": self.failures,
+            "mean_seconds": round(mean, 4),
+            "p50_seconds": round(self.percentile(50), 4),
+            "p95_seconds": round(self.percentile(95), 4),
+            "p99_seconds": round(self.percentile(99), 4),
+            "max_seconds": round(self.max_seconds, 4),
+        }
+
+
+class OEMSecretsClient:
+    """
+    Reusable client for the partsearch endpoint.
+
+    One pooled requests.Session keeps connections alive between calls.
+    429 and 5xx answers, timeouts and connection errors are retried with
+    jittered exponential backoff; every other answer (including 401, 400
+    and 404) is handed back to the caller untouched.
+    """
+
+    def __init__(self, api_base_url=API_BASE_URL, pool_size=8, connect_timeout=5.0,
+                 read_timeout=30.0, max_retries=4, backoff_base=0.5, backoff_max=30.0,
+                 country_code="DE", currency="EUR", verify=False):
+        self.api_base_url = api_base_url
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max(0, int(max_retries))
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.country_code = country_code
+        self.currency = currency
+        self.verify = verify
+        self.stats = LatencyStats()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, int(pool_size)))
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    @classmethod
+    def from_env(cls, pool_size=8):
+        """
+        Builds a client from the API_* environment variables.
+        """
+        return cls(
+            api_base_url=os.environ.get("OEM_API_BASE_URL", API_BASE_URL),
+            pool_size=pool_size,
+            connect_timeout=float(os.environ.get("API_CONNECT_TIMEOUT", "5")),
+            read_timeout=float(os.environ.get("API_READ_TIMEOUT", "30")),
+            max_retries=int(os.environ.get("API_MAX_RETRIES", "4")),
+            backoff_base=float(os.environ.get("API_BACKOFF_BASE", "0.5")),
+        )
+
+    def backoff_delay(self, attempt, retry_after=None):
+        """
+        Full-jitter exponential backoff, honouring a numeric Retry-After.
+        """
+        if retry_after:
+            try:
+                return min(self.backoff_max, float(retry_after))
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def search(self, part_number, api_key, before_attempt=None, after_attempt=None):
+        """
+        Runs one partsearch query and returns the final requests.Response.
+        Raises requests.exceptions.RequestException once retries run out
+        on a network error.
+
+        before_attempt(attempt) is called before every request (attempt 0
+        is the first one) and after_attempt(response) after it, with None
+        for a network error, so the caller can pace and count each request
+        sent with the key, retries included.
+        """
+        params = {
+            "apiKey": api_key,
+            "searchTerm": part_number,
+            "countryCode": self.country_code,
+            "currency": self.currency,
+        }
+        attempt = 0
+        while True:
+            if before_attempt is not None:
+                before_attempt(attempt)
+            start = time.perf_counter()
+            try:
+                response = self.session.get(
+                    self.api_base_url, params=params, timeout=self.timeout, verify=self.verify
+                )
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                self.stats.record(time.perf_counter() - start)
+                if after_attempt is not None:
+                    after_attempt(None)
+                if attempt >= self.max_retries:
+                    self.stats.record_failure()
+                    raise
+                retry_after = None
+            else:
+                self.stats.record(time.perf_counter() - start)
+                if after_attempt is not None:
+                    after_attempt(response)
+                if response.status_code not in RETRY_STATUS_CODES or attempt >= self.max_retries:
+                    return response
+                retry_after = response.headers.get("Retry-After")
+
+            self.stats.record_retry()
+            time.sleep(self.backoff_delay(attempt, retry_after))
+            attempt += 1
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,101 @@
+"""
+Columnar export of every ingest run.
+
+Each cleaned batch is appended to a Parquet dataset partitioned by pull date
+and category (hive layout: <dir>/Pulled_Date=YYYY-MM-DD/Categories=.../*.parquet),
+so long-range analytics can scan files with DuckDB or Arrow instead of
+querying the MySQL table the ingest is writing to.
+"""
+import glob
+import os
+from datetime import datetime
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+from sqlalchemy.types import BigInteger, DateTime, Float, Integer
+
+from mysql_loader import COLUMN_TYPES
+
+PARTITION_COLUMNS = ["Pulled_Date", "Categories"]
+
+
+def _arrow_type(col_type):
+    if isinstance(col_type, DateTime):
+        return pa.timestamp("us")
+    if isinstance(col_type, (Integer, BigInteger)):
+        return pa.int64()
+    if isinstance(col_type, Float):
+        return pa.float64()
+    return pa.string()
+
+
+# Fixed schema, so every file of the dataset has the same column types
+SCHEMA = pa.schema(
+    [pa.field(name, _arrow_type(col_type)) for name, col_type in COLUMN_TYPES.items()]
+    + [pa.field("Pulled_Date", pa.string())]
+)
+
+
+class ParquetExporter:
+    """
+    Appends the batches of one run to the dataset under `root_dir`. File
+    names carry the run's timestamp, the shard (if any) and the batch
+    number, so runs and shards never overwrite each other.
+
+    Each file is written as *.parquet.tmp and renamed once complete, so a
+    reader globbing *.parquet never opens a half-written file.
+    """
+
+    def __init__(self, root_dir, pulled_time, compression="zstd", shard=None):
+        self.root_dir = root_dir
+        self.run_id = pulled_time.strftime("%Y%m%dT%H%M%S")
+        if shard is not None:
+            self.run_id += f"-s{shard:03d}"
+        self.pulled_date = pulled_time.strftime("%Y-%m-%d")
+        self.compression = compression
+        self.batches = 0
+        self.rows = 0
+        self.seconds = 0.0
+
+    def remove_existing(self):
+        """
+        Deletes the files an earlier attempt of this run (and shard) wrote.
+        """
+        pattern = os.path.join(
+            self.root_dir, f"Pulled_Date={self.pulled_date}", "*", f"run-{self.run_id}-*.parquet*"
+        )
+        paths = glob.glob(pattern)
+        for path in paths:
+            os.remove(path)
+        return len(paths)
+
+    def write(self, df):
+        start = datetime.now()
+        df = df.assign(Pulled_Date=self.pulled_date)
+        table = pa.Table.from_pandas(df, schema=SCHEMA, preserve_index=False)
+        written = []
+        ds.write_dataset(
+            table,
+            self.root_dir,
+            format="parquet",
+            partitioning=ds.partitioning(
+                pa.schema([SCHEMA.field(c) for c in PARTITION_COLUMNS]), flavor="hive"
+            ),
+            basename_template=f"run-{self.run_id}-{self.batches:05d}-{{i}}.parquet.tmp",
+            existing_data_behavior="overwrite_or_ignore",
+            file_options=ds.ParquetFileFormat().make_write_options(compression=self.compression),
+            file_visitor=lambda written_file: written.append(written_file.path),
+        )
+        for path in written:
+            os.replace(path, path[:-len(".tmp")])
+        self.batches += 1
+        self.rows += len(df)
+        self.seconds += (datetime.now() - start).total_seconds()
+
+    def summary(self):
+        return {
+            "root_dir": os.path.abspath(self.root_dir),
+            "batches": self.batches,
+            "rows": self.rows,
+            "seconds": round(self.seconds, 2),
+        }
@@ -0,0 +1,141 @@
+import pandas as pd
+
+from lead_time import compute_new_lead_time
+from metrics import timed
+
+# Columns produced by the flatten stage, one row per price break
+COLUMNS = [
+    "Part_Number", "Categories", "Sub_Categories", "Sub_Categories2", "Category",
+    "Manufacturer", "Description", "Lead_time", "Lead_time_weeks", "Lead_time_format",
+    "Unit_break_QTY", "Unit_price_EUR", "Quantity_in_stock", "Factory_stock_quantity",
+    "On_order_quantity", "Partner_stock_quantity", "Distributor_name",
+    "Distributor_region", "Distributor_country", "Image_URL", "Buy_now_URL"
+]
+
+# Final columns order (DataPulledTime is added last)
+FINAL_COLUMNS = [
+    "Categories", "Sub_Categories", "Sub_Categories2", "Part_Number", "Manufacturer",
+    "Unit_break_QTY", "Unit_price_EUR", "Lead_time", "Lead_time_weeks", "Lead_time_format",
+    "Quantity_in_stock", "Factory_stock_quantity", "On_order_quantity",
+    "Partner_stock_quantity", "Distributor_name", "Distributor_region",
+    "Distributor_country", "Image_URL", "Buy_now_URL", "Category",
+    "Description", "New_Lead_Time"
+]
+
+QUANTITY_COLUMNS = [
+    "Quantity_in_stock",
+    "Factory_stock_quantity",
+    "On_order_quantity",
+    "Partner_stock_quantity"
+]
+
+TIME_COLUMNS = ["Lead_time", "Lead_time_weeks", "Lead_time_format"]
+
+
+def _empty_batch():
+    return {col: [] for col in COLUMNS}
+
+
+def iter_flat_batches(results, batch_size=50000):
+    """
+    Flattens ((part_number, categories, sub_categories, sub_categories2),
+    part_info) pairs into one row per price break and yields them as
+    DataFrames of about `batch_size` rows (the price breaks of one stock
+    entry are never split across batches).
+
+    Rows are collected column by column, so the per-stock fields are only
+    referenced (not copied into a new row list) for every price break, and
+    at most one batch is held in memory at a time.
+    """
+    batch = _empty_batch()
+    rows = 0
+
+    for catalog_row, part_info in results:
+        part_number, categories, sub_categories, sub_categories2 = catalog_row
+
+        if not part_info or "stock" not in part_info or not part_info["stock"]:
+            print(f"No data found for {part_number}")
+            continue
+
+        # Each "stock" entry may have multiple price breaks
+        for stock_info in part_info["stock"]:
+            prices = stock_info.get("prices", {})
+            if not isinstance(prices, dict):
+                print(f"Skipping entry due to unexpected 'prices' format: {prices}")
+                continue
+
+            price_list = prices.get("EUR", [])
+            distributor = stock_info.get("distributor", {})
+            static_values = {
+                "Part_Number": part_number,
+                "Categories": categories,
+                "Sub_Categories": sub_categories,
+                "Sub_Categories2": sub_categories2,
+                "Category": stock_info.get("category", "N/A"),
+                "Manufacturer": stock_info.get("manufacturer", "N/A"),
+                "Description": stock_info.get("description", "N/A"),
+                "Lead_time": stock_info.get("lead_time", "N/A"),
+                "Lead_time_weeks": stock_info.get("lead_time_weeks", "N/A"),
+                "Lead_time_format": stock_info.get("lead_time_format", "N/A"),
+                "Quantity_in_stock": stock_info.get("quantity_in_stock", "N/A"),
+                "Factory_stock_quantity": stock_info.get("factory_stock_quantity", "N/A"),
+                "On_order_quantity": stock_info.get("on_order_quantity", "N/A"),
+                "Partner_stock_quantity": stock_info.get("partner_stock_quantity", "N/A"),
+                "Distributor_name": distributor.get("distributor_name", "N/A"),
+                "Distributor_region": distributor.get("distributor_region", "N/A"),
+                "Distributor_country": distributor.get("distributor_country", "N/A"),
+                "Image_URL": stock_info.get("image_url", "N/A"),
+                "Buy_now_URL": stock_info.get("buy_now_url", "N/A"),
+            }
+
+            # If there's a price list, one row per price break; otherwise one "N/A" row
+            if isinstance(price_list, list) and price_list:
+                breaks = [(p.get("unit_break", "N/A"), p.get("unit_price", "N/A")) for p in price_list]
+            else:
+                breaks = [("N/A", "N/A")]
+
+            count = len(breaks)
+            for col, value in static_values.items():
+                batch[col].extend([value] * count)
+            batch["Unit_break_QTY"].extend(b[0] for b in breaks)
+            batch["Unit_price_EUR"].extend(b[1] for b in breaks)
+            rows += count
+
+            if rows >= batch_size:
+                yield pd.DataFrame(batch, columns=COLUMNS)
+                batch = _empty_batch()
+                rows = 0
+
+    if rows:
+        yield pd.DataFrame(batch, columns=COLUMNS)
+
+
+def clean_batch(new_df, manufacturers, pulled_time, metrics=None):
+    """
+    Data cleaning and standardization for one flattened batch. Returns a
+    new DataFrame with FINAL_COLUMNS plus DataPulledTime. The batch passed
+    in is modified in place. With `metrics`, the manufacturer and lead-time
+    steps are timed as their own stages.
+    """
+    # Each distinct manufacturer string is normalized once and mapped back
+    with timed(metrics, "clean_manufacturers", rows=len(new_df)):
+        new_df["Manufacturer"] = manufacturers.normalize(new_df["Manufacturer"])
+
+    # Fill blanks with 0 for quantity columns
+    for col in QUANTITY_COLUMNS:
+        new_df[col] = pd.to_numeric(new_df[col], errors="coerce").fillna(0).astype(int)
+
+    # Convert Unit_break_QTY to numeric
+    new_df["Unit_break_QTY"] = pd.to_numeric(new_df["Unit_break_QTY"], errors="coerce").fillna(0).astype(int)
+
+    # Convert Unit_price_EUR to numeric
+    new_df["Unit_price_EUR"] = pd.to_numeric(new_df["Unit_price_EUR"], errors="coerce").fillna(0)
+
+    # Convert lead time columns to lowercase
+    for col in TIME_COLUMNS:
+        new_df[col] = new_df[col].astype(str).str.lower()
+
+    with timed(metrics, "clean_lead_time", rows=len(new_df)):
+        new_df["New_Lead_Time"] = compute_new_lead_time(new_df)
+
+    return new_df[FINAL_COLUMNS].assign(DataPulledTime=pulled_time)
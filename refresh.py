@@ -0,0 +1,189 @@
+"""
+Priority-based refresh of the catalog (REFRESH_MODE=priority).
+
+Instead of pulling every part once a day, parts are ranked into tiers and
+refreshed as often as their tier asks for:
+
+  hourly  - pinned parts and parts whose prices change about daily or more
+  daily   - parts that change about weekly, scarce parts (low stock) and
+            parts without any history yet
+  weekly  - everything else
+
+Change frequency is the number of distinct prices per (part, distributor,
+price break) over the last REFRESH_LOOKBACK_DAYS days of history, per day;
+stock is the highest Quantity_in_stock any distributor reported in the
+part's latest pull. A part refreshed weekly can show at most one change a
+week, so a part that keeps changing moves up a tier on the next ranking.
+
+The scheduler ticks every few minutes. Each tick refreshes the parts that
+are due, most overdue (relative to their tier's interval) first, as many
+as its share of the remaining daily API budget allows, so the calls are
+spread over the day on the same key pool. When each part was last
+refreshed is kept in <table>_refresh_state.
+"""
+import json
+import math
+import os
+from datetime import datetime, timedelta
+
+import pandas as pd
+from sqlalchemy import Column, DateTime, String, Table, bindparam, text
+
+TIERS = {
+    "hourly": timedelta(hours=1),
+    "daily": timedelta(days=1),
+    "weekly": timedelta(days=7),
+}
+
+# Rows per DELETE ... WHERE Part_Number IN (...) statement
+STATE_CHUNK = 1000
+
+
+def refresh_state_table(metadata, table):
+    return Table(
+        f"{table}_refresh_state", metadata,
+        Column("Part_Number", String(128), primary_key=True),
+        Column("Last_Refreshed", DateTime(), nullable=False),
+        mysql_engine="InnoDB", mysql_charset="utf8mb4",
+    )
+
+
+def load_pinned(path):
+    """
+    Part numbers from a JSON list that are always refreshed hourly.
+    """
+    if not path:
+        return set()
+    with open(path, "r", encoding="utf-8") as f:
+        return {str(part) for part in json.load(f)}
+
+
+def part_activity(engine, table, since):
+    """
+    Per Part_Number: observed price changes since `since` and the highest
+    stock any distributor reported in the part's latest pull.
+    """
+    changes = pd.read_sql(text(
+        "SELECT Part_Number, SUM(Prices - 1) AS Changes FROM ("
+        "  SELECT Part_Number, COUNT(DISTINCT Unit_price_EUR) AS Prices"
+        f"  FROM {table} WHERE DataPulledTime >= :since AND Part_Number IS NOT NULL"
+        "  GROUP BY Part_Number, Distributor_name, Unit_break_QTY"
+        ") per_key GROUP BY Part_Number"
+    ), engine, params={"since": since})
+    stock = pd.read_sql(text(
+        f"SELECT t.Part_Number, MAX(t.Quantity_in_stock) AS Stock FROM {table} t JOIN ("
+        f"  SELECT Part_Number, MAX(DataPulledTime) AS Latest FROM {table}"
+        "  WHERE DataPulledTime >= :since GROUP BY Part_Number"
+        ") latest ON t.Part_Number = latest.Part_Number AND t.DataPulledTime = latest.Latest "
+        "GROUP BY t.Part_Number"
+    ), engine, params={"since": since})
+    return changes.merge(stock, on="Part_Number", how="outer").set_index("Part_Number")
+
+
+def assign_tiers(part_numbers, activity, pinned, lookback_days, hot_changes_per_day=1.0,
+                 warm_changes_per_day=1 / 7, low_stock=100):
+    """
+    Series Part_Number -> tier for every catalog part.
+    """
+    parts = pd.Index(pd.unique(pd.Series(part_numbers, dtype=object).dropna().astype(str)))
+    # An empty history gives object columns; the comparisons below need numbers
+    activity = activity.reindex(parts).apply(pd.to_numeric)
+    changes_per_day = activity["Changes"].fillna(0) / max(lookback_days, 1)
+    stock = activity["Stock"]
+    known = activity["Changes"].notna() | stock.notna()
+
+    tiers = pd.Series("weekly", index=parts, dtype=object)
+    tiers[(changes_per_day >= warm_changes_per_day) | (stock < low_stock) | ~known] = "daily"
+    tiers[(changes_per_day >= hot_changes_per_day) | parts.isin(list(pinned))] = "hourly"
+    return tiers
+
+
+def tick_budget(daily_budget, calls_used, now, tick):
+    """
+    API calls this tick may spend: what is left of today's budget, split
+    evenly over the ticks left today. None when there is no budget.
+    """
+    if not daily_budget:
+        return None
+    midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+    ticks_left = max(1, math.ceil((midnight - now) / tick))
+    return max(0, daily_budget - calls_used) // ticks_left
+
+
+class RefreshPlanner:
+    """
+    Ranks the catalog into tiers (again every `rank_every`) and picks the
+    parts each tick refreshes.
+    """
+
+    def __init__(self, engine, table, pinned=(), lookback_days=30, rank_every=timedelta(hours=24),
+                 hot_changes_per_day=1.0, warm_changes_per_day=1 / 7, low_stock=100):
+        self.engine = engine
+        self.table = table
+        self.state_table = f"{table}_refresh_state"
+        self.pinned = set(pinned)
+        self.lookback_days = lookback_days
+        self.rank_every = rank_every
+        self.thresholds = {
+            "hot_changes_per_day": hot_changes_per_day,
+            "warm_changes_per_day": warm_changes_per_day,
+            "low_stock": low_stock,
+        }
+        self.tiers = None
+        self.ranked_at = None
+
+    @classmethod
+    def from_env(cls, engine, table):
+        return cls(
+            engine,
+            table,
+            pinned=load_pinned(os.environ.get("PINNED_PARTS_PATH", "")),
+            lookback_days=int(os.environ.get("REFRESH_LOOKBACK_DAYS", "30")),
+            rank_every=timedelta(hours=float(os.environ.get("REFRESH_RANK_HOURS", "24"))),
+            hot_changes_per_day=float(os.environ.get("REFRESH_HOT_CHANGES_PER_DAY", "1")),
+            warm_changes_per_day=float(os.environ.get("REFRESH_WARM_CHANGES_PER_DAY", str(1 / 7))),
+            low_stock=int(os.environ.get("REFRESH_LOW_STOCK", "100")),
+        )
+
+    def rank(self, part_numbers, now):
+        since = now - timedelta(days=self.lookback_days)
+        activity = part_activity(self.engine, self.table, since)
+        self.tiers = assign_tiers(part_numbers, activity, self.pinned, self.lookback_days, **self.thresholds)
+        self.ranked_at = now
+        print(f"Refresh tiers: {self.tiers.value_counts().to_dict()}")
+
+    def last_refreshed(self):
+        state = pd.read_sql(text(f"SELECT Part_Number, Last_Refreshed FROM {self.state_table}"), self.engine)
+        return pd.Series(pd.to_datetime(state["Last_Refreshed"]).to_numpy(), index=state["Part_Number"])
+
+    def due_parts(self, part_numbers, now, budget=None):
+        """
+        The parts to refresh now, most overdue first, at most `budget` of them.
+        """
+        catalog = set(pd.Series(part_numbers, dtype=object).dropna().astype(str))
+        if self.tiers is None or now - self.ranked_at >= self.rank_every or set(self.tiers.index) != catalog:
+            self.rank(part_numbers, now)
+
+        intervals = self.tiers.map(lambda tier: TIERS[tier].total_seconds())
+        last = self.last_refreshed().reindex(self.tiers.index)
+        elapsed = (pd.Timestamp(now) - last).dt.total_seconds()
+        # Never refreshed parts are due first
+        overdue = (elapsed / intervals).fillna(math.inf)
+        due = overdue[overdue >= 1].sort_values(ascending=False, kind="stable")
+        if budget is not None:
+            due = due.iloc[:budget]
+        return due.index.tolist()
+
+    def mark_refreshed(self, part_numbers, refreshed_at):
+        """
+        Records `refreshed_at` as the last refresh of these parts.
+        """
+        delete = text(f"DELETE FROM {self.state_table} WHERE Part_Number IN :parts").bindparams(
+            bindparam("parts", expanding=True)
+        )
+        insert = text(f"INSERT INTO {self.state_table} (Part_Number, Last_Refreshed) VALUES (:p, :r)")
+        with self.engine.begin() as conn:
+            for i in range(0, len(part_numbers), STATE_CHUNK):
+                chunk = part_numbers[i:i + STATE_CHUNK]
+                conn.execute(delete, {"parts": chunk})
+                conn.execute(insert, [{"p": part, "r": refreshed_at} for part in chunk])
@@ -0,0 +1,105 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+
+class ResponseCache:
+    """
+    Content-addressed on-disk cache of raw partsearch JSON.
+
+    Each response is stored under the SHA-256 of (part number, country,
+    currency), fanned out over 256 sub-folders. Entries older than
+    `ttl_seconds` count as stale, and evict() trims the folder back under
+    `max_bytes` by dropping stale entries first and then the oldest ones.
+    """
+
+    def __init__(self, cache_dir, ttl_seconds=12 * 3600, max_bytes=512 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(part_number, country_code, currency):
+        raw = json.dumps([str(part_number), country_code, currency])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def path_for(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def get(self, part_number, country_code, currency):
+        """
+        Returns the cached JSON if it exists and is still fresh, else None.
+        """
+        path = self.path_for(self.make_key(part_number, country_code, currency))
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            entry = None
+
+        fresh = entry is not None and time.time() - entry.get("fetched_at", 0) <= self.ttl_seconds
+        with self._lock:
+            if fresh:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return entry["response"] if fresh else None
+
+    def put(self, part_number, country_code, currency, response):
+        path = self.path_for(self.make_key(part_number, country_code, currency))
+        folder = os.path.dirname(path)
+        os.makedirs(folder, exist_ok=True)
+        entry = {
+            "part_number": str(part_number),
+            "country_code": country_code,
+            "currency": currency,
+            "fetched_at": time.time(),
+            "response": response,
+        }
+        # Write to a temp file first so readers never see half an entry
+        fd, tmp_path = tempfile.mkstemp(dir=folder, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
+
+    def evict(self):
+        """
+        Removes stale entries, then the oldest ones until the cache fits
+        in max_bytes. Returns the number of files removed.
+        """
+        now = time.time()
+        entries = []
+        total = 0
+        removed = 0
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    info = os.stat(path)
+                except OSError:
+                    continue
+                if now - info.st_mtime > self.ttl_seconds:
+                    os.remove(path)
+                    removed += 1
+                    continue
+                entries.append((info.st_mtime, info.st_size, path))
+                total += info.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+            removed += 1
+        return removed
+
+    def summary(self):
+        return {"hits": self.hits, "misses": self.misses}
@@ -0,0 +1,199 @@
+"""
+Daily price rollups for the dashboard charts.
+
+The rollups hold SUM/COUNT/MIN/MAX of Unit_price_EUR per day and dimension
+over exactly the rows of the history table. Every batch the ingest appends
+to history (in delta mode: only the changed rows) is added to the rollups
+in the same transaction, the migration that creates the tables backfills
+them from existing history, and a retried shard recomputes the keys whose
+rows it deleted. Averages are SUM/COUNT, so a chart read from a rollup
+shows the same numbers as the same chart over the raw rows.
+
+Run `python rollups.py --since 2025-01-01` to rebuild rollups from the
+history table by hand.
+"""
+import argparse
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+from sqlalchemy import (
+    BigInteger, Column, Date, Float, PrimaryKeyConstraint, String, Table, bindparam, text,
+)
+
+from mysql_loader import database_from_env, get_engine
+
+# Rollup name -> dimension columns (the rollup table is <table>_rollup_<name>_daily)
+ROLLUPS = {
+    "manufacturer": ["Manufacturer"],
+    "distributor": ["Distributor_name"],
+    "part_distributor": ["Part_Number", "Distributor_name"],
+}
+
+DIMENSION_TYPES = {
+    "Manufacturer": String(255),
+    "Distributor_name": String(255),
+    "Part_Number": String(128),
+}
+
+MEASURES = ["Price_Sum", "Price_Count", "Price_Min", "Price_Max"]
+
+# Dimension values per DELETE/INSERT of recompute_rollups()
+RECOMPUTE_CHUNK = 1000
+
+
+def rollup_table_name(table, name):
+    return f"{table}_rollup_{name}_daily"
+
+
+def rollup_table(metadata, table, name):
+    dims = ROLLUPS[name]
+    columns = [Column("Pulled_Date", Date(), nullable=False)]
+    columns += [Column(dim, DIMENSION_TYPES[dim], nullable=False) for dim in dims]
+    columns += [
+        Column("Price_Sum", Float(precision=53), nullable=False),
+        Column("Price_Count", BigInteger(), nullable=False),
+        Column("Price_Min", Float(precision=53)),
+        Column("Price_Max", Float(precision=53)),
+    ]
+    return Table(
+        rollup_table_name(table, name), metadata, *columns,
+        PrimaryKeyConstraint("Pulled_Date", *dims),
+        mysql_engine="InnoDB", mysql_charset="utf8mb4",
+    )
+
+
+def aggregate(df):
+    """
+    {rollup name: SUM/COUNT/MIN/MAX of Unit_price_EUR per day and dimensions} for a batch.
+    """
+    prices = df.assign(Pulled_Date=pd.to_datetime(df["DataPulledTime"]).dt.date)
+    return {
+        name: prices.groupby(["Pulled_Date"] + dims, as_index=False).agg(
+            Price_Sum=("Unit_price_EUR", "sum"),
+            Price_Count=("Unit_price_EUR", "count"),
+            Price_Min=("Unit_price_EUR", "min"),
+            Price_Max=("Unit_price_EUR", "max"),
+        ).sort_values(["Pulled_Date"] + dims)
+        for name, dims in ROLLUPS.items()
+    }
+
+
+def _upsert_sql(dialect_name, rollup, dims):
+    columns = ["Pulled_Date"] + dims + MEASURES
+    insert = (
+        f"INSERT INTO {rollup} ({', '.join(columns)}) "
+        f"VALUES ({', '.join(':' + c for c in columns)})"
+    )
+    if dialect_name == "mysql":
+        return insert + (
+            " ON DUPLICATE KEY UPDATE Price_Sum = Price_Sum + VALUES(Price_Sum), "
+            "Price_Count = Price_Count + VALUES(Price_Count), "
+            "Price_Min = LEAST(COALESCE(Price_Min, VALUES(Price_Min)), COALESCE(VALUES(Price_Min), Price_Min)), "
+            "Price_Max = GREATEST(COALESCE(Price_Max, VALUES(Price_Max)), COALESCE(VALUES(Price_Max), Price_Max))"
+        )
+    return insert + (
+        f" ON CONFLICT (Pulled_Date, {', '.join(dims)}) DO UPDATE SET "
+        "Price_Sum = Price_Sum + excluded.Price_Sum, "
+        "Price_Count = Price_Count + excluded.Price_Count, "
+        "Price_Min = MIN(COALESCE(Price_Min, excluded.Price_Min), COALESCE(excluded.Price_Min, Price_Min)), "
+        "Price_Max = MAX(COALESCE(Price_Max, excluded.Price_Max), COALESCE(excluded.Price_Max, Price_Max))"
+    )
+
+
+def add_to_rollups(conn, table, df):
+    """
+    Adds a batch of history rows to the stored rollups of their days.
+
+    Call it with the connection that inserts the same rows into the history
+    table, so both are committed together: the rollups then always describe
+    exactly the rows in history, even when a run fails midway. The upsert
+    only adds to the stored values, so shards can write at the same time.
+    Returns the number of rollup rows touched.
+    """
+    if df.empty:
+        return 0
+    touched = 0
+    for name, partial in aggregate(df).items():
+        if partial.empty:
+            continue
+        rollup = rollup_table_name(table, name)
+        rows = partial.astype(object).where(partial.notna(), None).to_dict("records")
+        conn.execute(text(_upsert_sql(conn.dialect.name, rollup, ROLLUPS[name])), rows)
+        touched += len(rows)
+    return touched
+
+
+def _rebuild(conn, table, name, start=None, end=None, first_dim_values=None):
+    """
+    Recomputes rollup `name` from the history table for the days in
+    [start, end) and, when given, only for these values of its first
+    dimension.
+    """
+    dims = ROLLUPS[name]
+    rollup = rollup_table_name(table, name)
+    dim_list = ", ".join(dims)
+    history_where = [f"{d} IS NOT NULL" for d in dims]
+    rollup_where = []
+    history_params = {}
+    rollup_params = {}
+    if start is not None:
+        history_where.append("DataPulledTime >= :start")
+        rollup_where.append("Pulled_Date >= :start")
+        history_params["start"] = start
+        rollup_params["start"] = start.date() if isinstance(start, datetime) else start
+    if end is not None:
+        history_where.append("DataPulledTime < :end")
+        rollup_where.append("Pulled_Date < :end")
+        history_params["end"] = end
+        rollup_params["end"] = end.date() if isinstance(end, datetime) else end
+
+    delete = f"DELETE FROM {rollup}" + (f" WHERE {' AND '.join(rollup_where)}" if rollup_where else "")
+    insert = (
+        f"INSERT INTO {rollup} (Pulled_Date, {dim_list}, Price_Sum, Price_Count, Price_Min, Price_Max) "
+        f"SELECT DATE(DataPulledTime), {dim_list}, SUM(Unit_price_EUR), COUNT(Unit_price_EUR), "
+        f"MIN(Unit_price_EUR), MAX(Unit_price_EUR) FROM {table} WHERE {' AND '.join(history_where)} "
+        f"GROUP BY DATE(DataPulledTime), {dim_list}"
+    )
+    if first_dim_values is None:
+        conn.execute(text(delete), rollup_params)
+        conn.execute(text(insert), history_params)
+        return
+    condition = f"{dims[0]} IN :values"
+    delete += f" AND {condition}" if rollup_where else f" WHERE {condition}"
+    insert = insert.replace(" GROUP BY ", f" AND {condition} GROUP BY ")
+    values = bindparam("values", expanding=True)
+    conn.execute(text(delete).bindparams(values), dict(rollup_params, values=list(first_dim_values)))
+    conn.execute(text(insert).bindparams(values), dict(history_params, values=list(first_dim_values)))
+
+
+def rebuild_rollups(conn, table, since=None):
+    """
+    Recomputes the rollups from the history table for every day on or
+    after `since` (all days when None).
+    """
+    for name in ROLLUPS:
+        _rebuild(conn, table, name, start=since)
+
+
+def recompute_rollups(conn, table, day, rows):
+    """
+    Recomputes the rollups of one day for the dimension values in `rows`
+    (e.g. rows just deleted from history), so they match history again.
+    """
+    start = datetime.combine(day, datetime.min.time())
+    end = start + timedelta(days=1)
+    for name, dims in ROLLUPS.items():
+        values = rows[dims[0]].dropna().unique().tolist()
+        for i in range(0, len(values), RECOMPUTE_CHUNK):
+            _rebuild(conn, table, name, start=start, end=end, first_dim_values=values[i:i + RECOMPUTE_CHUNK])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild the daily price rollups from history")
+    parser.add_argument("--since", type=date.fromisoformat, default=None, help="YYYY-MM-DD")
+    args = parser.parse_args()
+
+    database_url, mysql_table = database_from_env()
+    with get_engine(database_url).begin() as conn:
+        rebuild_rollups(conn, mysql_table, since=args.since)
+    print(f"Rollups rebuilt for {mysql_table} since {args.since or 'the beginning'}")
@@ -0,0 +1,348 @@
+"""
+Managed schema for the productdetails table.
+
+Migrations are applied in order and recorded per table in
+schema_migrations, so every run of the ingest can call migrate() safely.
+On MySQL the table is range-partitioned by month on DataPulledTime and
+ensure_partitions() keeps a few future months ready.
+
+Run `python schema.py` to apply pending migrations by hand.
+"""
+from datetime import date, datetime
+
+from sqlalchemy import (
+    BigInteger, Column, DateTime, Index, Integer, MetaData, PrimaryKeyConstraint, Table,
+    inspect, text,
+)
+
+from filter_options import filter_options_table, rebuild_filter_options
+from mysql_loader import COLUMN_TYPES, database_from_env, get_engine
+from refresh import refresh_state_table
+from rollups import ROLLUPS, rebuild_rollups, rollup_table
+from sharding import runs_table, shards_table
+
+MIGRATIONS_TABLE = "schema_migrations"
+
+# Composite indexes for the dashboard's filters and the price-over-time view
+INDEXES = {
+    "idx_pulled": ["DataPulledTime"],
+    "idx_part_pulled": ["Part_Number", "DataPulledTime"],
+    "idx_manufacturer_pulled": ["Manufacturer", "DataPulledTime"],
+    "idx_distributor_pulled": ["Distributor_name", "DataPulledTime"],
+    "idx_categories": ["Categories", "Sub_Categories", "Sub_Categories2"],
+    # One part's price history per distributor (added by migration 007)
+    "idx_part_distributor_pulled": ["Part_Number", "Distributor_name", "DataPulledTime"],
+}
+
+
+def productdetails_table(metadata, table, dialect_name):
+    """
+    SQLAlchemy definition of the productdetails table for a dialect.
+    MySQL needs DataPulledTime in the primary key to partition on it.
+    """
+    columns = [Column("id", BigInteger().with_variant(Integer, "sqlite"), autoincrement=True)]
+    for name, col_type in COLUMN_TYPES.items():
+        if name == "DataPulledTime":
+            columns.append(Column(name, DateTime(), nullable=False))
+        else:
+            columns.append(Column(name, col_type))
+
+    if dialect_name == "mysql":
+        primary_key = PrimaryKeyConstraint("id", "DataPulledTime")
+    else:
+        primary_key = PrimaryKeyConstraint("id")
+
+    indexes = [Index(f"{table}_{name}", *cols) for name, cols in INDEXES.items()]
+    return Table(
+        table, metadata, *columns, primary_key, *indexes,
+        mysql_engine="InnoDB", mysql_charset="utf8mb4",
+    )
+
+
+def current_table(metadata, table):
+    """
+    Latest known state of every (Part_Number, Distributor_name,
+    Unit_break_QTY) row, used by the delta snapshot mode. Row_Key and
+    Row_Hash are 64-bit hashes of the key and of the row's values.
+    """
+    columns = [
+        Column("Row_Key", BigInteger(), primary_key=True, autoincrement=False),
+        Column("Row_Hash", BigInteger(), nullable=False),
+    ]
+    columns += [Column(name, col_type) for name, col_type in COLUMN_TYPES.items()]
+    indexes = [
+        Index(f"{table}_idx_part", "Part_Number"),
+        Index(f"{table}_idx_manufacturer", "Manufacturer"),
+        Index(f"{table}_idx_distributor", "Distributor_name"),
+    ]
+    return Table(table, metadata, *columns, *indexes, mysql_engine="InnoDB", mysql_charset="utf8mb4")
+
+
+def completed_runs_table(metadata, table):
+    """
+    One row per ingest run, shard or refresh tick that finished loading.
+    The dashboard keys its query cache on the newest Id, so results read
+    while a snapshot is still being written are dropped once it completes.
+    """
+    return Table(
+        f"{table}_ingest_completed", metadata,
+        Column("Id", BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True),
+        Column("Pulled_Time", DateTime(), nullable=False),
+        Column("Shard_Index", Integer()),
+        Column("Rows", BigInteger(), nullable=False),
+        Column("Finished_At", DateTime(), nullable=False),
+        mysql_engine="InnoDB", mysql_charset="utf8mb4",
+    )
+
+
+def record_completed_run(engine, table, pulled_time, rows, shard_index=None):
+    """
+    Marks the snapshot of `pulled_time` (or one shard of it) as fully loaded.
+    """
+    with engine.begin() as conn:
+        conn.execute(
+            text(f"INSERT INTO {table}_ingest_completed (Pulled_Time, Shard_Index, Rows, Finished_At) "
+                 "VALUES (:p, :s, :n, :f)"),
+            {"p": pulled_time, "s": shard_index, "n": rows, "f": datetime.now()},
+        )
+
+
+def _month_start(value, months=0):
+    month_index = value.year * 12 + value.month - 1 + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+# ------------------------------------------------------------------------------
+# Migrations
+# ------------------------------------------------------------------------------
+def migration_001_create_table(conn, table):
+    """
+    Create the table with a primary key, typed columns and indexes. A table
+    previously created by DataFrame.to_sql (no id column) is renamed to
+    <table>_legacy and its rows are copied over.
+    """
+    dialect_name = conn.dialect.name
+    inspector = inspect(conn)
+    legacy_table = None
+    if inspector.has_table(table):
+        existing = {c["name"] for c in inspector.get_columns(table)}
+        if "id" in existing:
+            return
+        legacy_table = f"{table}_legacy"
+        conn.execute(text(f"ALTER TABLE {table} RENAME TO {legacy_table}"))
+
+    metadata = MetaData()
+    productdetails_table(metadata, table, dialect_name).create(conn)
+
+    if legacy_table:
+        copy_columns = [c for c in COLUMN_TYPES if c in existing]
+        column_list = ", ".join(copy_columns)
+        conn.execute(text(
+            f"INSERT INTO {table} ({column_list}) SELECT {column_list} FROM {legacy_table} "
+            "WHERE DataPulledTime IS NOT NULL"
+        ))
+        print(f"Copied existing rows into the managed table; {legacy_table} can be dropped.")
+
+
+def migration_002_partition_by_month(conn, table):
+    """
+    MySQL only: range-partition on DataPulledTime, one partition per month
+    from the oldest row up to a few months ahead, plus a catch-all pmax.
+    """
+    if conn.dialect.name != "mysql":
+        return
+    oldest = conn.execute(text(f"SELECT MIN(DataPulledTime) FROM {table}")).scalar()
+    first = _month_start(oldest or datetime.now())
+    last = _month_start(datetime.now(), 3)
+
+    partitions = []
+    month = first
+    while month <= last:
+        upper = _month_start(month, 1)
+        partitions.append(f"PARTITION p{month:%Y%m} VALUES LESS THAN ('{upper.isoformat()}')")
+        month = upper
+    partitions.append("PARTITION pmax VALUES LESS THAN (MAXVALUE)")
+    conn.execute(text(
+        f"ALTER TABLE {table} PARTITION BY RANGE COLUMNS(DataPulledTime) ({', '.join(partitions)})"
+    ))
+
+
+def migration_003_create_current_table(conn, table):
+    """
+    Create <table>_current, the "latest state" table kept by delta snapshots.
+    """
+    current_table(MetaData(), f"{table}_current").create(conn, checkfirst=True)
+
+
+def migration_004_create_rollup_tables(conn, table):
+    """
+    Create the daily price rollup tables read by the dashboard charts and
+    fill them from the history already in the table.
+    """
+    metadata = MetaData()
+    for name in ROLLUPS:
+        rollup_table(metadata, table, name).create(conn, checkfirst=True)
+    rebuild_rollups(conn, table)
+
+
+def migration_005_create_shard_checkpoints(conn, table):
+    """
+    Create the run registry and per-shard checkpoint tables of sharded ingests.
+    """
+    metadata = MetaData()
+    runs_table(metadata, table).create(conn, checkfirst=True)
+    shards_table(metadata, table).create(conn, checkfirst=True)
+
+
+def migration_006_create_refresh_state(conn, table):
+    """
+    Create <table>_refresh_state, when each part was last refreshed in priority mode.
+    """
+    refresh_state_table(MetaData(), table).create(conn, checkfirst=True)
+
+
+def migration_007_add_price_history_index(conn, table):
+    """
+    Index (Part_Number, Distributor_name, DataPulledTime) for the dashboard's
+    price history of one part.
+    """
+    name = f"{table}_idx_part_distributor_pulled"
+    if name in {index["name"] for index in inspect(conn).get_indexes(table)}:
+        return
+    history = Table(table, MetaData(), autoload_with=conn)
+    Index(name, *(history.c[c] for c in INDEXES["idx_part_distributor_pulled"])).create(conn)
+
+
+def migration_008_create_completed_runs(conn, table):
+    """
+    Create <table>_ingest_completed, the completion markers the dashboard cache is keyed on.
+    """
+    completed_runs_table(MetaData(), table).create(conn, checkfirst=True)
+
+
+def migration_009_add_shard_heartbeat(conn, table):
+    """
+    Add Heartbeat_At to the shard checkpoints, the lease of a running shard.
+    """
+    shards = f"{table}_ingest_shards"
+    if "Heartbeat_At" in {column["name"] for column in inspect(conn).get_columns(shards)}:
+        return
+    conn.execute(text(f"ALTER TABLE {shards} ADD COLUMN Heartbeat_At DATETIME"))
+
+
+def migration_010_create_filter_options(conn, table):
+    """
+    Create <table>_filter_options, the dashboard's filter values, and fill
+    it from the history already in the table.
+    """
+    filter_options_table(MetaData(), table).create(conn, checkfirst=True)
+    rebuild_filter_options(conn, table)
+
+
+def migration_011_drop_refresh_state_tier(conn, table):
+    """
+    Drop the Tier column of <table>_refresh_state: tiers are ranked in memory and it was never read.
+    """
+    state = f"{table}_refresh_state"
+    if "Tier" not in {column["name"] for column in inspect(conn).get_columns(state)}:
+        return
+    conn.execute(text(f"ALTER TABLE {state} DROP COLUMN Tier"))
+
+
+MIGRATIONS = [
+    (1, "create table with primary key, types and indexes", migration_001_create_table),
+    (2, "monthly range partitions on DataPulledTime", migration_002_partition_by_month),
+    (3, "create current-state table for delta snapshots", migration_003_create_current_table),
+    (4, "create daily price rollup tables", migration_004_create_rollup_tables),
+    (5, "create shard run registry and checkpoints", migration_005_create_shard_checkpoints),
+    (6, "create refresh state for priority scheduling", migration_006_create_refresh_state),
+    (7, "index part, distributor and pull time for price history", migration_007_add_price_history_index),
+    (8, "create completion markers of ingest runs", migration_008_create_completed_runs),
+    (9, "add heartbeat lease to shard checkpoints", migration_009_add_shard_heartbeat),
+    (10, "create filter options for the dashboard sidebar", migration_010_create_filter_options),
+    (11, "drop the unused tier from the refresh state", migration_011_drop_refresh_state_tier),
+]
+
+
+def migrate(engine, table):
+    """
+    Applies every pending migration for `table`. Returns the list of
+    versions that were applied.
+    """
+    with engine.begin() as conn:
+        conn.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {MIGRATIONS_TABLE} ("
+            "table_name VARCHAR(64) NOT NULL, version INTEGER NOT NULL, "
+            "description VARCHAR(255), applied_at DATETIME, "
+            "PRIMARY KEY (table_name, version))"
+        ))
+        done = {
+            row[0] for row in conn.execute(
+                text(f"SELECT version FROM {MIGRATIONS_TABLE} WHERE table_name = :t"), {"t": table}
+            )
+        }
+
+    applied = []
+    for version, description, migration in MIGRATIONS:
+        if version in done:
+            continue
+        print(f"Applying migration {version} on {table}: {description}")
+        # MySQL commits DDL implicitly; the record is written right after it
+        with engine.begin() as conn:
+            migration(conn, table)
+            conn.execute(
+                text(f"INSERT INTO {MIGRATIONS_TABLE} (table_name, version, description, applied_at) "
+                     "VALUES (:t, :v, :d, :a)"),
+                {"t": table, "v": version, "d": description, "a": datetime.now()},
+            )
+        applied.append(version)
+    return applied
+
+
+def ensure_partitions(engine, table, start=None, months_ahead=3):
+    """
+    MySQL only: makes sure there is one partition per month from `start`
+    (default: the current month) to `months_ahead` months from now, by
+    splitting the partition that currently holds each missing month.
+    """
+    if engine.dialect.name != "mysql":
+        return []
+    first = _month_start(start or datetime.now())
+    last = _month_start(datetime.now(), months_ahead)
+
+    added = []
+    month = first
+    while month <= last:
+        upper = _month_start(month, 1).isoformat()
+        with engine.begin() as conn:
+            rows = conn.execute(text(
+                "SELECT PARTITION_NAME, PARTITION_DESCRIPTION FROM information_schema.PARTITIONS "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :t AND PARTITION_NAME IS NOT NULL "
+                "ORDER BY PARTITION_ORDINAL_POSITION"
+            ), {"t": table}).fetchall()
+            if not rows:
+                return added
+            bounds = [(name, desc.strip("'")[:10]) for name, desc in rows]
+            if not any(bound == upper for _, bound in bounds):
+                # The first partition whose bound is above `upper` holds that month today
+                name, desc = next(
+                    (name, desc) for name, desc in rows
+                    if desc == "MAXVALUE" or desc.strip("'")[:10] > upper
+                )
+                bound_sql = "MAXVALUE" if desc == "MAXVALUE" else desc
+                conn.execute(text(
+                    f"ALTER TABLE {table} REORGANIZE PARTITION {name} INTO ("
+                    f"PARTITION p{month:%Y%m} VALUES LESS THAN ('{upper}'), "
+                    f"PARTITION {name} VALUES LESS THAN ({bound_sql}))"
+                ))
+                added.append(f"p{month:%Y%m}")
+        month = _month_start(month, 1)
+    return added
+
+
+if __name__ == "__main__":
+    database_url, mysql_table = database_from_env()
+    engine = get_engine(database_url)
+    applied = migrate(engine, mysql_table)
+    added = ensure_partitions(engine, mysql_table)
+    print(f"Migrations applied: {applied or 'none'}; partitions added: {added or 'none'}")
@@ -0,0 +1,267 @@
+"""
+Work partitioning for the ingest.
+
+The catalog is split into SHARD_COUNT shards, either by a stable hash of
+the part number or by whole categories (balanced by part count). Every
+process or container that runs shards reads the same catalog, so all of
+them compute the same split. Each shard uses its own slice of the API keys
+and its own key-state file.
+
+All shards of a run share one DataPulledTime: the first shard (or the
+coordinating process) registers the run in <table>_ingest_runs and every
+other shard reads the timestamp from there. <table>_ingest_shards keeps a
+checkpoint per shard (running / done / failed), so a rerun skips finished
+shards and a failed shard can be retried on its own.
+
+A process claims a shard with one conditional INSERT/UPDATE, so two
+replicas never run the same shard. A running shard renews its heartbeat
+after every batch; one whose heartbeat is older than the lease
+(SHARD_LEASE_MINUTES) is taken to belong to a dead process and may be
+claimed again, and the process that lost it stops at its next heartbeat.
+"""
+import os
+import zlib
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+
+import pandas as pd
+from sqlalchemy import (
+    Column, DateTime, Integer, PrimaryKeyConstraint, String, Table, Text, bindparam, text,
+)
+from sqlalchemy.exc import IntegrityError
+
+from rollups import recompute_rollups
+
+SHARD_MODES = {"hash", "category"}
+
+# Rows per DELETE ... WHERE Part_Number IN (...) statement
+DELETE_CHUNK = 1000
+
+
+def runs_table(metadata, table):
+    return Table(
+        f"{table}_ingest_runs", metadata,
+        Column("Run_Id", String(64), primary_key=True),
+        Column("Pulled_Time", DateTime(), nullable=False),
+        Column("Shard_Count", Integer(), nullable=False),
+        Column("Shard_By", String(16), nullable=False),
+        Column("Created_At", DateTime(), nullable=False),
+        mysql_engine="InnoDB", mysql_charset="utf8mb4",
+    )
+
+
+def shards_table(metadata, table):
+    return Table(
+        f"{table}_ingest_shards", metadata,
+        Column("Run_Id", String(64), nullable=False),
+        Column("Shard_Index", Integer(), nullable=False),
+        Column("Status", String(16), nullable=False),
+        Column("Attempts", Integer(), nullable=False),
+        Column("Rows", Integer()),
+        Column("Started_At", DateTime()),
+        Column("Heartbeat_At", DateTime()),
+        Column("Finished_At", DateTime()),
+        Column("Error", Text()),
+        PrimaryKeyConstraint("Run_Id", "Shard_Index"),
+        mysql_engine="InnoDB", mysql_charset="utf8mb4",
+    )
+
+
+def shard_of(value, shard_count):
+    """
+    Stable shard number for a value (the same in every process, unlike hash()).
+    """
+    return zlib.crc32(str(value).encode("utf-8")) % shard_count
+
+
+def assign_categories(df, shard_count):
+    """
+    Maps every category to a shard, largest categories first onto the
+    least loaded shard, so shards get similar part counts.
+    """
+    counts = df["Categories"].fillna("").value_counts()
+    ordered = sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+    load = [0] * shard_count
+    assignment = {}
+    for category, count in ordered:
+        shard = min(range(shard_count), key=lambda i: (load[i], i))
+        assignment[category] = shard
+        load[shard] += count
+    return assignment
+
+
+def select_shard(df, shard_count, shard_index, shard_by="hash"):
+    """
+    The catalog rows that belong to one shard.
+    """
+    if shard_by not in SHARD_MODES:
+        raise ValueError(f"Unknown shard mode: {shard_by}")
+    if shard_count <= 1:
+        return df
+    if shard_by == "category":
+        assignment = assign_categories(df, shard_count)
+        shards = df["Categories"].fillna("").map(assignment)
+    else:
+        shards = df["Part_Number"].map(lambda part: shard_of(part, shard_count))
+    return df[shards == shard_index]
+
+
+def key_slice(api_keys, shard_count, shard_index):
+    """
+    Every shard_count-th key, starting at shard_index. Shards never share a
+    key: each shard paces and tracks its keys on its own, so a shared key
+    would get SHARD_COUNT times its rate limit and be found exhausted by
+    every shard separately.
+    """
+    if shard_count <= 1:
+        return list(api_keys)
+    if len(api_keys) < shard_count:
+        raise ValueError(
+            f"{len(api_keys)} API keys cannot be split over {shard_count} shards; "
+            "use at least one key per shard or fewer shards"
+        )
+    return list(api_keys)[shard_index::shard_count]
+
+
+def shard_path(path, shard_index):
+    """
+    api_key_state.json -> api_key_state.shard3.json
+    """
+    root, ext = os.path.splitext(path)
+    return f"{root}.shard{shard_index}{ext}"
+
+
+class ShardCheckpoints:
+    """
+    Run registry and per-shard checkpoints in the database.
+    """
+
+    def __init__(self, engine, table):
+        self.engine = engine
+        self.runs = f"{table}_ingest_runs"
+        self.shards = f"{table}_ingest_shards"
+
+    def start_run(self, run_id, shard_count, shard_by, pulled_time=None):
+        """
+        Registers the run unless another shard did already and returns the
+        run's DataPulledTime.
+        """
+        try:
+            with self.engine.begin() as conn:
+                conn.execute(text(
+                    f"INSERT INTO {self.runs} (Run_Id, Pulled_Time, Shard_Count, Shard_By, Created_At) "
+                    "VALUES (:r, :p, :c, :b, :a)"
+                ), {"r": run_id, "p": pulled_time or datetime.now(), "c": shard_count, "b": shard_by,
+                    "a": datetime.now()})
+        except IntegrityError:
+            pass
+        with self.engine.connect() as conn:
+            row = conn.execute(
+                text(f"SELECT Pulled_Time, Shard_Count, Shard_By FROM {self.runs} WHERE Run_Id = :r"),
+                {"r": run_id},
+            ).one()
+        if (row[1], row[2]) != (shard_count, shard_by):
+            raise ValueError(
+                f"Run {run_id} was started with {row[1]} shards by {row[2]}, "
+                f"not {shard_count} by {shard_by}; use another RUN_ID"
+            )
+        # SQLite hands DATETIME columns of a text() query back as strings
+        return datetime.fromisoformat(row[0]) if isinstance(row[0], str) else row[0]
+
+    def status(self, run_id):
+        """
+        {shard_index: status} for the shards of a run that have started.
+        """
+        with self.engine.connect() as conn:
+            rows = conn.execute(
+                text(f"SELECT Shard_Index, Status FROM {self.shards} WHERE Run_Id = :r"), {"r": run_id}
+            ).fetchall()
+        return {index: status for index, status in rows}
+
+    def claim_shard(self, run_id, shard_index, lease=timedelta(hours=1)):
+        """
+        Atomically marks a shard as running for this process. Returns the
+        attempt number, or None when the shard is done or another process
+        holds it. Only a first attempt, a failed shard or a running shard
+        whose heartbeat is older than `lease` can be claimed.
+        """
+        now = datetime.now()
+        params = {"r": run_id, "i": shard_index, "t": now}
+        try:
+            with self.engine.begin() as conn:
+                conn.execute(text(
+                    f"INSERT INTO {self.shards} "
+                    "(Run_Id, Shard_Index, Status, Attempts, Started_At, Heartbeat_At) "
+                    "VALUES (:r, :i, 'running', 1, :t, :t)"
+                ), params)
+            return 1
+        except IntegrityError:
+            pass
+        with self.engine.begin() as conn:
+            claimed = conn.execute(text(
+                f"UPDATE {self.shards} SET Status = 'running', Attempts = Attempts + 1, "
+                "Started_At = :t, Heartbeat_At = :t, Finished_At = NULL, Error = NULL "
+                "WHERE Run_Id = :r AND Shard_Index = :i AND (Status = 'failed' OR "
+                "(Status = 'running' AND COALESCE(Heartbeat_At, Started_At) < :stale))"
+            ), {**params, "stale": now - lease}).rowcount
+            if not claimed:
+                return None
+            return conn.execute(
+                text(f"SELECT Attempts FROM {self.shards} WHERE Run_Id = :r AND Shard_Index = :i"), params
+            ).scalar()
+
+    def heartbeat(self, run_id, shard_index, attempt, conn=None):
+        """
+        Renews the lease of a claimed shard. Raises when another process
+        has claimed it since, so the stale attempt stops writing. Given the
+        connection that writes a batch, the batch is rolled back with it.
+        """
+        with nullcontext(conn) if conn is not None else self.engine.begin() as conn:
+            renewed = conn.execute(text(
+                f"UPDATE {self.shards} SET Heartbeat_At = :t "
+                "WHERE Run_Id = :r AND Shard_Index = :i AND Attempts = :a AND Status = 'running'"
+            ), {"t": datetime.now(), "r": run_id, "i": shard_index, "a": attempt}).rowcount
+        if not renewed:
+            raise RuntimeError(f"Shard {shard_index} of run {run_id} was claimed by another process")
+
+    def finish_shard(self, run_id, shard_index, attempt, rows):
+        self._set(run_id, shard_index, attempt, "done", rows=rows)
+
+    def fail_shard(self, run_id, shard_index, attempt, error):
+        self._set(run_id, shard_index, attempt, "failed", error=str(error)[:2000])
+
+    def _set(self, run_id, shard_index, attempt, status, rows=None, error=None):
+        # Only the attempt that holds the shard may close it
+        with self.engine.begin() as conn:
+            conn.execute(text(
+                f"UPDATE {self.shards} SET Status = :s, Rows = :n, Error = :e, Finished_At = :t "
+                "WHERE Run_Id = :r AND Shard_Index = :i AND Attempts = :a"
+            ), {"s": status, "n": rows, "e": error, "t": datetime.now(), "r": run_id, "i": shard_index,
+                "a": attempt})
+
+
+def delete_partial_rows(engine, table, pulled_time, part_numbers, rollups=True):
+    """
+    Removes what an earlier, unfinished attempt of a shard inserted for
+    this run, so the retry does not duplicate rows. With `rollups`, the
+    rollup keys of the deleted rows are recomputed in the same transaction.
+    """
+    parts = bindparam("parts", expanding=True)
+    delete = text(
+        f"DELETE FROM {table} WHERE DataPulledTime = :p AND Part_Number IN :parts"
+    ).bindparams(parts)
+    affected = text(
+        f"SELECT DISTINCT Manufacturer, Distributor_name, Part_Number FROM {table} "
+        "WHERE DataPulledTime = :p AND Part_Number IN :parts"
+    ).bindparams(parts)
+    deleted = 0
+    with engine.begin() as conn:
+        keys = []
+        for i in range(0, len(part_numbers), DELETE_CHUNK):
+            params = {"p": pulled_time, "parts": part_numbers[i:i + DELETE_CHUNK]}
+            if rollups:
+                keys.append(pd.read_sql(affected, conn, params=params))
+            deleted += conn.execute(delete, params).rowcount
+        if rollups and deleted:
+            recompute_rollups(conn, table, pulled_time.date(), pd.concat(keys, ignore_index=True))
+    return deleted
@@ -0,0 +1,139 @@
+from contextlib import nullcontext
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import bindparam, text
+
+from mysql_loader import BulkLoader
+
+# One row of the snapshot is identified by these columns
+KEY_COLUMNS = ["Part_Number", "Distributor_name", "Unit_break_QTY"]
+
+# Rows per DELETE ... WHERE Row_Key IN (...) statement
+DELETE_CHUNK = 1000
+
+
+def _hash_columns(df, columns):
+    """
+    Deterministic 64-bit hash per row (same input, same value on every run),
+    stored as signed BIGINT.
+    """
+    hashed = pd.util.hash_pandas_object(df[columns], index=False)
+    return hashed.to_numpy().view(np.int64)
+
+
+class SnapshotWriter:
+    """
+    Change-only ("delta") snapshots.
+
+    Every row is hashed and compared against the hash stored for its
+    (Part_Number, Distributor_name, Unit_break_QTY) key in the current-state
+    table. Only new or changed rows are appended to the history table and
+    upserted into the current-state table; unchanged rows are not written.
+
+    If one run returns the same key more than once (e.g. two stock entries
+    of a distributor with the same price break), the first row wins.
+
+    History rows and the current-state update of a batch are written in
+    one transaction. remove_missing() drops current-state rows of parts
+    that came back in this run without that distributor/price break.
+    """
+
+    def __init__(self, engine, history_table, current_table, method="executemany", chunksize=5000):
+        self.engine = engine
+        self.current_table = current_table
+        self.history = BulkLoader(engine, history_table, method=method, chunksize=chunksize)
+        self.current = BulkLoader(engine, current_table, method=method, chunksize=chunksize)
+        self.known = None
+        self.seen = set()
+        self.parts = set()
+        self.rows_seen = 0
+        self.rows_changed = 0
+        self.rows_removed = 0
+
+    def load_state(self):
+        """
+        Reads the stored row hashes, keyed by Row_Key.
+        """
+        state = pd.read_sql(text(f"SELECT Row_Key, Row_Hash FROM {self.current_table}"), self.engine)
+        self.known = pd.Series(
+            state["Row_Hash"].to_numpy(dtype=np.int64), index=state["Row_Key"].to_numpy(dtype=np.int64)
+        )
+
+    def write(self, df, conn=None):
+        """
+        Appends the new or changed rows of a batch to history and returns
+        them. With `conn`, everything goes into the caller's transaction.
+        """
+        if self.known is None:
+            self.load_state()
+        self.rows_seen += len(df)
+        self.parts.update(df["Part_Number"].dropna().astype(str))
+
+        value_columns = [c for c in df.columns if c != "DataPulledTime"]
+        df = df.assign(
+            Row_Key=_hash_columns(df, KEY_COLUMNS),
+            Row_Hash=_hash_columns(df, value_columns),
+        )
+
+        # First occurrence of each key in this run only
+        df = df.drop_duplicates("Row_Key")
+        df = df[~df["Row_Key"].isin(self.seen)]
+        self.seen.update(df["Row_Key"].tolist())
+
+        # Positions in the stored state (-1 for new keys); compared as int64,
+        # never through a float reindex
+        positions = self.known.index.get_indexer(df["Row_Key"].to_numpy())
+        if len(self.known):
+            stored = self.known.to_numpy()[positions]
+            changed = df[(positions < 0) | (stored != df["Row_Hash"].to_numpy())]
+        else:
+            changed = df
+        appended = changed.drop(columns=["Row_Key", "Row_Hash"])
+        if changed.empty:
+            return appended
+
+        # History and current state change together or not at all, so a
+        # crash cannot leave keys missing from the current-state table
+        with nullcontext(conn) if conn is not None else self.engine.begin() as conn:
+            self.history.write(appended, conn=conn)
+            self._delete_keys(conn, changed["Row_Key"].tolist())
+            self.current.write(changed, conn=conn)
+        self.rows_changed += len(changed)
+        return appended
+
+    def _delete_keys(self, conn, keys):
+        delete = text(f"DELETE FROM {self.current_table} WHERE Row_Key IN :keys").bindparams(
+            bindparam("keys", expanding=True)
+        )
+        for i in range(0, len(keys), DELETE_CHUNK):
+            conn.execute(delete, {"keys": keys[i:i + DELETE_CHUNK]})
+
+    def remove_missing(self):
+        """
+        Call after the last batch of a successful run: removes current-state
+        rows of the parts this run returned data for whose (distributor,
+        price break) was not in the answer any more. Parts without any
+        answer are left alone, since a failed lookup looks the same as a
+        delisted part. Returns the number of rows removed.
+        """
+        select = text(f"SELECT Row_Key FROM {self.current_table} WHERE Part_Number IN :parts").bindparams(
+            bindparam("parts", expanding=True)
+        )
+        parts = sorted(self.parts)
+        with self.engine.begin() as conn:
+            stale = []
+            for i in range(0, len(parts), DELETE_CHUNK):
+                rows = conn.execute(select, {"parts": parts[i:i + DELETE_CHUNK]})
+                stale += [key for (key,) in rows if key not in self.seen]
+            self._delete_keys(conn, stale)
+        self.rows_removed += len(stale)
+        return len(stale)
+
+    def summary(self):
+        return {
+            "rows_seen": self.rows_seen,
+            "rows_changed": self.rows_changed,
+            "rows_skipped": self.rows_seen - self.rows_changed,
+            "rows_removed": self.rows_removed,
+        }
@@ -0,0 +1,148 @@
+"""
+DuckDB backend for the dashboard, reading the Parquet dataset written by
+the ingest (PARQUET_EXPORT_DIR) instead of the MySQL table.
+
+The functions mirror queries.py. Filters become a WHERE clause on the
+read_parquet() scan, so DuckDB only reads the selected columns, skips
+Pulled_Date/Categories partitions that cannot match and prunes row
+groups by their min/max statistics.
+"""
+import os
+
+import duckdb
+import pandas as pd
+
+from queries import DISPLAY_COLUMNS, HISTORY_RESOLUTIONS, _check_column, build_where
+
+
+def connect(threads=None):
+    conn = duckdb.connect()
+    if threads:
+        conn.execute(f"SET threads = {int(threads)}")
+    return conn
+
+
+def dataset_source(root_dir):
+    """
+    FROM expression for the hive-partitioned dataset under `root_dir`.
+    """
+    pattern = os.path.join(root_dir, "**", "*.parquet").replace("'", "''")
+    return f"read_parquet('{pattern}', hive_partitioning = true, union_by_name = true)"
+
+
+def _where(filters):
+    return build_where(filters, placeholder=lambda name: f"${name}")
+
+
+def _read(conn, query, params=None):
+    # One cursor per call: the connection is shared by every dashboard session
+    with conn.cursor() as cursor:
+        return cursor.execute(query, params or {}).df()
+
+
+def latest_pull(conn, source):
+    return _read(conn, f"SELECT MAX(DataPulledTime) AS latest FROM {source}")["latest"].iloc[0]
+
+
+def ingest_version(conn, source):
+    """
+    (newest DataPulledTime, row count): the dataset has no completion
+    marker, and every batch a run appends changes the count, so results
+    cached from a partial run are dropped once the run has finished. The
+    count comes from the Parquet footers, not from a scan.
+    """
+    row = _read(conn, f"SELECT MAX(DataPulledTime) AS latest, COUNT(*) AS n FROM {source}").iloc[0]
+    return row["latest"], int(row["n"])
+
+
+def count_rows(conn, source, filters=None):
+    where, params = _where(filters or {})
+    return int(_read(conn, f"SELECT COUNT(*) AS n FROM {source}{where}", params)["n"].iloc[0])
+
+
+def distinct_values(conn, source, column, filters=None):
+    column = _check_column(column)
+    where, params = _where(filters or {})
+    where = f"{where} AND {column} IS NOT NULL" if where else f" WHERE {column} IS NOT NULL"
+    query = f"SELECT DISTINCT {column} FROM {source}{where} ORDER BY {column}"
+    return _read(conn, query, params)[column].tolist()
+
+
+def search_values(conn, source, column, prefix, limit=50):
+    column = _check_column(column)
+    query = (
+        f"SELECT DISTINCT {column} FROM {source} WHERE starts_with({column}, $prefix) "
+        f"ORDER BY {column} LIMIT {int(limit)}"
+    )
+    return _read(conn, query, {"prefix": prefix})[column].tolist()
+
+
+def page_rows(conn, source, filters, limit=500, offset=0, columns=DISPLAY_COLUMNS):
+    where, params = _where(filters)
+    column_list = ", ".join(_check_column(c) for c in columns)
+    # The dataset has no row id; (part, distributor, price break) is unique within a snapshot
+    query = (
+        f"SELECT {column_list} FROM {source}{where} "
+        "ORDER BY DataPulledTime DESC, Part_Number, Distributor_name, Unit_break_QTY "
+        f"LIMIT {int(limit)} OFFSET {int(offset)}"
+    )
+    return _read(conn, query, params)
+
+
+def average_price_by(conn, source, filters, column):
+    column = _check_column(column)
+    where, params = _where(filters)
+    query = (
+        f"SELECT {column}, AVG(Unit_price_EUR) AS Unit_price_EUR FROM {source}{where} "
+        f"GROUP BY {column} ORDER BY {column}"
+    )
+    return _read(conn, query, params)
+
+
+# No rollup tables next to the dataset; the scan is fast enough on its own
+chart_average_price_by = average_price_by
+
+
+def part_details(conn, source, filters, part_number):
+    filters = dict(filters, Part_Number=[part_number])
+    where, params = _where(filters)
+    query = (
+        f"SELECT Image_URL, Buy_now_URL FROM {source}{where} "
+        "ORDER BY DataPulledTime DESC LIMIT 1"
+    )
+    df = _read(conn, query, params)
+    return None if df.empty else df.iloc[0].to_dict()
+
+
+def _history_query(source, filters, part_number, resolution):
+    if resolution not in HISTORY_RESOLUTIONS:
+        raise ValueError(f"Unknown resolution: {resolution}")
+    where, params = _where(dict(filters, Part_Number=[part_number]))
+    if resolution == "raw":
+        return (
+            "SELECT DataPulledTime, Distributor_name, Unit_break_QTY, Unit_price_EUR "
+            f"FROM {source}{where}"
+        ), params
+    bucket = f"CAST(date_trunc('{resolution}', DataPulledTime) AS DATE)"
+    return (
+        f"SELECT {bucket} AS DataPulledTime, Distributor_name, "
+        "AVG(Unit_price_EUR) AS Unit_price_EUR, MIN(Unit_price_EUR) AS Price_Min, "
+        f"MAX(Unit_price_EUR) AS Price_Max, COUNT(Unit_price_EUR) AS Observations FROM {source}{where} "
+        f"GROUP BY {bucket}, Distributor_name"
+    ), params
+
+
+def count_price_history(conn, source, filters, part_number, resolution="raw"):
+    query, params = _history_query(source, filters, part_number, resolution)
+    return int(_read(conn, f"SELECT COUNT(*) AS n FROM ({query}) history", params)["n"].iloc[0])
+
+
+def price_history(conn, source, filters, part_number, resolution="raw", limit=None, offset=0):
+    query, params = _history_query(source, filters, part_number, resolution)
+    query += " ORDER BY DataPulledTime DESC, Distributor_name"
+    if resolution == "raw":
+        query += ", Unit_break_QTY"
+    if limit is not None:
+        query += f" LIMIT {int(limit)} OFFSET {int(offset)}"
+    df = _read(conn, query, params)
+    return df.assign(DataPulledTime=pd.to_datetime(df["DataPulledTime"]))
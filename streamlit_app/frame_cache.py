@@ -0,0 +1,78 @@
+"""
+Memory-bounded cache for the dashboard's row results.
+
+st.cache_data only bounds a cache by entry count, and one page of 5000
+rows with descriptions and URLs weighs megabytes. Result pages and price
+histories are therefore kept here: one LRU per process, shared by every
+session, that drops the least recently used results once their total
+size passes `max_bytes`. Sizes are pandas' deep memory usage.
+"""
+import json
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+
+def result_size(value):
+    """
+    Bytes a cached result takes (deep memory usage for DataFrames).
+    """
+    if hasattr(value, "memory_usage"):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    return sys.getsizeof(value)
+
+
+class FrameCache:
+    """
+    LRU of query results bounded by their total size and by age.
+
+    Results are shared between sessions, so callers must not modify them.
+    """
+
+    def __init__(self, max_bytes, ttl_seconds):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # key -> (stored at, size, value)
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(*parts):
+        return json.dumps(parts, sort_keys=True, default=str)
+
+    def get(self, key, compute):
+        """
+        The cached result for `key`, or compute() stored under it.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] <= self.ttl_seconds:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[2]
+            self.misses += 1
+        value = compute()
+        self.put(key, value)
+        return value
+
+    def put(self, key, value):
+        size = result_size(value)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            # A result larger than the whole budget is served but not kept
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (time.monotonic(), size, value)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, evicted, _) = self._entries.popitem(last=False)
+                self.bytes -= evicted
+
+    def summary(self):
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self.bytes, "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,340 @@
+"""
+SQL query layer for the dashboard.
+
+Sidebar selections are turned into parameterized WHERE clauses and the
+aggregations run in the database, so only aggregated or paged rows come
+back to Streamlit instead of the whole productdetails history.
+"""
+import pandas as pd
+from sqlalchemy import inspect, text
+
+# Sidebar filters: label -> column (only these columns can be filtered on)
+FILTER_COLUMNS = {
+    "Categories": "Categories",
+    "Sub Categories": "Sub_Categories",
+    "Sub Categories 2": "Sub_Categories2",
+    "Part Number": "Part_Number",
+    "Manufacturer": "Manufacturer",
+    "Distributor Name": "Distributor_name",
+    "Distributor Region": "Distributor_region",
+    "Distributor Country": "Distributor_country",
+    "Unit Break QTY": "Unit_break_QTY",
+}
+
+DISPLAY_COLUMNS = [
+    "Categories",
+    "Sub_Categories",
+    "Sub_Categories2",
+    "Part_Number",
+    "Manufacturer",
+    "Distributor_name",
+    "Distributor_region",
+    "Distributor_country",
+    "Unit_break_QTY",
+    "Unit_price_EUR",
+    "New_Lead_Time",
+    "DataPulledTime",
+    "Quantity_in_stock",
+    "Factory_stock_quantity",
+    "On_order_quantity",
+    "Partner_stock_quantity",
+]
+
+# Repeated text dimensions, held as pandas categoricals in the dashboard
+CATEGORY_COLUMNS = [
+    "Categories",
+    "Sub_Categories",
+    "Sub_Categories2",
+    "Manufacturer",
+    "Distributor_name",
+    "Distributor_region",
+    "Distributor_country",
+]
+
+# Cascading filters: the options of a column are limited by the selections
+# made in its parent columns
+FILTER_PARENTS = {
+    "Sub_Categories": ["Categories"],
+    "Sub_Categories2": ["Categories", "Sub_Categories"],
+}
+
+# Columns with too many values to list; picked through a type-ahead search
+SEARCH_COLUMNS = {"Part_Number"}
+
+ALLOWED_COLUMNS = set(FILTER_COLUMNS.values()) | set(DISPLAY_COLUMNS) | {"Image_URL", "Buy_now_URL"}
+
+# Price history of one part: every row, or min/mean/max per day or week
+HISTORY_RESOLUTIONS = ("raw", "day", "week")
+
+# Daily rollup tables written by the ingest (see rollups.py): name -> dimensions
+ROLLUP_DIMENSIONS = {
+    "manufacturer": ["Manufacturer"],
+    "distributor": ["Distributor_name"],
+    "part_distributor": ["Part_Number", "Distributor_name"],
+}
+
+
+def _check_column(column):
+    if column not in ALLOWED_COLUMNS:
+        raise ValueError(f"Unknown column: {column}")
+    return column
+
+
+def compact(df):
+    """
+    Categoricals for the text dimensions and float32 prices, so cached
+    frames take a fraction of the memory of object/float64 columns.
+    """
+    dtypes = {c: "category" for c in CATEGORY_COLUMNS if c in df.columns}
+    if "Unit_price_EUR" in df.columns:
+        dtypes["Unit_price_EUR"] = "float32"
+    return df.astype(dtypes)
+
+
+def build_where(filters, placeholder=lambda name: f":{name}"):
+    """
+    Turns {column: [values]} into (" WHERE ...", params). Empty selections
+    are ignored; every value gets its own bound parameter.
+    """
+    clauses = []
+    params = {}
+    for i, (column, values) in enumerate(filters.items()):
+        if not values:
+            continue
+        names = []
+        for j, value in enumerate(values):
+            name = f"f{i}_{j}"
+            params[name] = value
+            names.append(placeholder(name))
+        clauses.append(f"{_check_column(column)} IN ({', '.join(names)})")
+    where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+    return where, params
+
+
+def count_rows(engine, table, filters=None):
+    where, params = build_where(filters or {})
+    with engine.connect() as conn:
+        return conn.execute(text(f"SELECT COUNT(*) FROM {table}{where}"), params).scalar()
+
+
+def latest_pull(engine, table):
+    """
+    Newest DataPulledTime in the table.
+    """
+    with engine.connect() as conn:
+        return conn.execute(text(f"SELECT MAX(DataPulledTime) FROM {table}")).scalar()
+
+
+def ingest_version(engine, table):
+    """
+    Changes whenever an ingest run, shard or refresh tick finishes loading:
+    the newest completion marker in <table>_ingest_completed. Rows of a run
+    still in progress do not change it. A database the ingest has not
+    migrated yet falls back to (newest DataPulledTime, row count).
+    """
+    markers = f"{table}_ingest_completed"
+    if not inspect(engine).has_table(markers):
+        return latest_pull(engine, table), count_rows(engine, table)
+    with engine.connect() as conn:
+        return conn.execute(text(f"SELECT MAX(Id) FROM {markers}")).scalar()
+
+
+def distinct_values(engine, table, column, filters=None):
+    """
+    Sorted distinct values of `column`, optionally within `filters` on its
+    parent columns. Read from <table>_filter_options, which the ingest keeps
+    up to date, instead of scanning the history; a database the ingest has
+    not migrated yet is scanned.
+    """
+    column = _check_column(column)
+    where, params = build_where(filters or {})
+    options = f"{table}_filter_options"
+    if not inspect(engine).has_table(options):
+        where = f"{where} AND {column} IS NOT NULL" if where else f" WHERE {column} IS NOT NULL"
+        query = f"SELECT DISTINCT {column} FROM {table}{where} ORDER BY {column}"
+        return pd.read_sql(text(query), engine, params=params)[column].tolist()
+
+    where = f"{where} AND Column_Name = :option_column" if where else " WHERE Column_Name = :option_column"
+    query = f"SELECT DISTINCT Value FROM {options}{where} ORDER BY Value"
+    values = pd.read_sql(text(query), engine, params=dict(params, option_column=column))["Value"]
+    if column == "Unit_break_QTY":
+        # Stored as text; offered as numbers in numeric order
+        return sorted(pd.to_numeric(values).astype("int64").tolist())
+    return values.tolist()
+
+
+def search_values(engine, table, column, prefix, limit=50):
+    """
+    Up to `limit` distinct values of `column` starting with `prefix`
+    (a prefix LIKE, so the column's index can be used).
+    """
+    column = _check_column(column)
+    pattern = prefix.replace("!", "!!").replace("%", "!%").replace("_", "!_") + "%"
+    query = (
+        f"SELECT DISTINCT {column} FROM {table} WHERE {column} LIKE :pattern ESCAPE '!' "
+        f"ORDER BY {column} LIMIT {int(limit)}"
+    )
+    return pd.read_sql(text(query), engine, params={"pattern": pattern})[column].tolist()
+
+
+def page_rows(engine, table, filters, limit=500, offset=0, columns=DISPLAY_COLUMNS):
+    """
+    One page of filtered rows, newest snapshot first. A snapshot shares one
+    DataPulledTime, so the unique id fixes the order within it and pages
+    never repeat or skip rows.
+    """
+    where, params = build_where(filters)
+    column_list = ", ".join(_check_column(c) for c in columns)
+    query = (
+        f"SELECT {column_list} FROM {table}{where} "
+        f"ORDER BY DataPulledTime DESC, id DESC LIMIT {int(limit)} OFFSET {int(offset)}"
+    )
+    return pd.read_sql(text(query), engine, params=params)
+
+
+def average_price_by(engine, table, filters, column):
+    """
+    Mean Unit_price_EUR per value of `column`, computed in the database.
+    """
+    column = _check_column(column)
+    where, params = build_where(filters)
+    query = (
+        f"SELECT {column}, AVG(Unit_price_EUR) AS Unit_price_EUR FROM {table}{where} "
+        f"GROUP BY {column} ORDER BY {column}"
+    )
+    return pd.read_sql(text(query), engine, params=params)
+
+
+def rollup_average_price_by(engine, table, filters, column):
+    """
+    Mean Unit_price_EUR per value of `column` from the daily rollup tables
+    (SUM(Price_Sum) / SUM(Price_Count), the same value AVG() gives over the
+    raw rows). Returns None when no rollup covers `column` and every active
+    filter, or when the rollup table does not exist yet.
+    """
+    column = _check_column(column)
+    active = {c for c, values in filters.items() if values}
+    for name, dims in ROLLUP_DIMENSIONS.items():
+        if column in dims and active <= set(dims):
+            rollup = f"{table}_rollup_{name}_daily"
+            break
+    else:
+        return None
+    if not inspect(engine).has_table(rollup):
+        return None
+
+    where, params = build_where({c: filters[c] for c in active})
+    query = (
+        f"SELECT {column}, SUM(Price_Sum) / SUM(Price_Count) AS Unit_price_EUR FROM {rollup}{where} "
+        f"GROUP BY {column} ORDER BY {column}"
+    )
+    return pd.read_sql(text(query), engine, params=params)
+
+
+def chart_average_price_by(engine, table, filters, column):
+    """
+    Rollup-backed average when possible, otherwise aggregated over the
+    raw rows.
+    """
+    df = rollup_average_price_by(engine, table, filters, column)
+    if df is None:
+        df = average_price_by(engine, table, filters, column)
+    return df
+
+
+def part_details(engine, table, filters, part_number):
+    """
+    Image_URL and Buy_now_URL of a part's newest row (within the other
+    filters), or None when no row matches.
+    """
+    filters = dict(filters, Part_Number=[part_number])
+    where, params = build_where(filters)
+    query = (
+        f"SELECT Image_URL, Buy_now_URL FROM {table}{where} "
+        "ORDER BY DataPulledTime DESC LIMIT 1"
+    )
+    df = pd.read_sql(text(query), engine, params=params)
+    return None if df.empty else df.iloc[0].to_dict()
+
+
+def _bucket(dialect_name, column, resolution):
+    """
+    SQL expression for the first day of the day/week (Monday) of `column`.
+    """
+    if resolution == "day":
+        return f"DATE({column})"
+    if dialect_name == "mysql":
+        return f"DATE({column}) - INTERVAL WEEKDAY({column}) DAY"
+    if dialect_name == "sqlite":
+        return f"DATE({column}, '-6 days', 'weekday 1')"
+    return f"CAST(date_trunc('week', {column}) AS DATE)"
+
+
+def _history_query(engine, table, filters, part_number, resolution):
+    """
+    (SELECT ..., params) of a part's price history without ORDER BY/LIMIT.
+
+    Daily and weekly points come from the part/distributor rollup when it
+    exists and no other filter than Distributor_name is active; otherwise
+    they are aggregated over the raw rows.
+    """
+    if resolution not in HISTORY_RESOLUTIONS:
+        raise ValueError(f"Unknown resolution: {resolution}")
+    filters = dict(filters, Part_Number=[part_number])
+    if resolution == "raw":
+        where, params = build_where(filters)
+        return (
+            "SELECT DataPulledTime, Distributor_name, Unit_break_QTY, Unit_price_EUR "
+            f"FROM {table}{where}"
+        ), params
+
+    dialect_name = engine.dialect.name
+    active = {c: values for c, values in filters.items() if values}
+    rollup = f"{table}_rollup_part_distributor_daily"
+    if set(active) <= set(ROLLUP_DIMENSIONS["part_distributor"]) and inspect(engine).has_table(rollup):
+        where, params = build_where(active)
+        bucket = "Pulled_Date" if resolution == "day" else _bucket(dialect_name, "Pulled_Date", resolution)
+        return (
+            f"SELECT {bucket} AS DataPulledTime, Distributor_name, "
+            "SUM(Price_Sum) / SUM(Price_Count) AS Unit_price_EUR, MIN(Price_Min) AS Price_Min, "
+            f"MAX(Price_Max) AS Price_Max, SUM(Price_Count) AS Observations FROM {rollup}{where} "
+            f"GROUP BY {bucket}, Distributor_name"
+        ), params
+
+    where, params = build_where(filters)
+    bucket = _bucket(dialect_name, "DataPulledTime", resolution)
+    return (
+        f"SELECT {bucket} AS DataPulledTime, Distributor_name, "
+        "AVG(Unit_price_EUR) AS Unit_price_EUR, MIN(Unit_price_EUR) AS Price_Min, "
+        f"MAX(Unit_price_EUR) AS Price_Max, COUNT(Unit_price_EUR) AS Observations FROM {table}{where} "
+        f"GROUP BY {bucket}, Distributor_name"
+    ), params
+
+
+def count_price_history(engine, table, filters, part_number, resolution="raw"):
+    """
+    Number of points price_history() has for the part at `resolution`.
+    """
+    query, params = _history_query(engine, table, filters, part_number, resolution)
+    with engine.connect() as conn:
+        return conn.execute(text(f"SELECT COUNT(*) FROM ({query}) history"), params).scalar()
+
+
+def price_history(engine, table, filters, part_number, resolution="raw", limit=None, offset=0):
+    """
+    One part's prices over time (within the other filters), newest first,
+    served through the (Part_Number, Distributor_name, DataPulledTime)
+    index. "raw" returns every row; "day" and "week" return min/mean/max
+    and the number of observations per period and distributor. `limit`
+    and `offset` page through the points.
+    """
+    query, params = _history_query(engine, table, filters, part_number, resolution)
+    query += " ORDER BY DataPulledTime DESC, Distributor_name"
+    if resolution == "raw":
+        # Raw rows tie on every price break of a snapshot; the id keeps pages stable
+        query += ", Unit_break_QTY, id"
+    if limit is not None:
+        query += f" LIMIT {int(limit)} OFFSET {int(offset)}"
+    df = pd.read_sql(text(query), engine, params=params)
+    # DATE() comes back as text on SQLite
+    return df.assign(DataPulledTime=pd.to_datetime(df["DataPulledTime"]))
@@ -1,10 +1,12 @@
 import os
 import streamlit as st
-import pandas as pd
 from sqlalchemy import create_engine
 import plotly.express as px
 import plotly.colors
 
+from frame_cache import FrameCache
+from queries import FILTER_COLUMNS, FILTER_PARENTS, SEARCH_COLUMNS, compact
+
 # 1. Page Config
 st.set_page_config(page_title="Product Data Dashboard", layout="wide")
 st.title("Product Data Dashboard")
@@ -17,18 +19,105 @@ mysql_port = os.environ.get("MYSQL_PORT", "3306")
 mysql_database = os.environ.get("MYSQL_DATABASE", "productcatalog")
 mysql_table = os.environ.get("MYSQL_TABLE", "productdetails")
 
-connection_url = f"mysql+pymysql://{mysql_user}:{mysql_password}@{mysql_host}:{mysql_port}/{mysql_database}"
-from sqlalchemy import create_engine
-engine = create_engine(connection_url)
+# Full SQLAlchemy URL override (e.g. sqlite:///local.db for local runs)
+database_url = os.environ.get("DATABASE_URL", "")
+
+connection_url = database_url or f"mysql+pymysql://{mysql_user}:{mysql_password}@{mysql_host}:{mysql_port}/{mysql_database}"
+
+# "sql" queries the database; "duckdb" scans the Parquet dataset written by the
+# ingest (PARQUET_EXPORT_DIR) and needs no database server
+dashboard_backend = os.environ.get("DASHBOARD_BACKEND", "sql")
+parquet_dataset_dir = os.environ.get("PARQUET_DATASET_DIR", "parquet")
+
+# Query cache shared by all sessions: entries expire after DASHBOARD_CACHE_TTL
+# seconds. Counts, options and chart averages keep at most
+# DASHBOARD_CACHE_MAX_ENTRIES results per query; result pages and price
+# histories together take at most DASHBOARD_CACHE_MAX_MB per process
+cache_ttl = int(os.environ.get("DASHBOARD_CACHE_TTL", "3600"))
+cache_max_entries = int(os.environ.get("DASHBOARD_CACHE_MAX_ENTRIES", "256"))
+cache_max_mb = int(os.environ.get("DASHBOARD_CACHE_MAX_MB", "256"))
+# How often (seconds) to check for a new ingest
+version_ttl = int(os.environ.get("DASHBOARD_VERSION_TTL", "60"))
+# Most points drawn in a part's price chart; "Auto" picks the finest
+# resolution (raw, daily, weekly) that stays under it
+history_max_points = int(os.environ.get("DASHBOARD_HISTORY_MAX_POINTS", "2000"))
+
+# One engine (and connection pool) per process, shared by every session
+@st.cache_resource
+def get_engine(url):
+    return create_engine(url, pool_pre_ping=True, pool_recycle=3600)
+
+if dashboard_backend == "duckdb":
+    import duckdb_queries as backend
+
+    # One in-process DuckDB per process; every query gets its own cursor
+    @st.cache_resource
+    def get_duckdb():
+        return backend.connect()
+
+    db = get_duckdb()
+    source = backend.dataset_source(parquet_dataset_dir)
+else:
+    import queries as backend
+
+    db = get_engine(connection_url)
+    source = mysql_table
+
+@st.cache_resource
+def get_frame_cache(max_bytes, ttl_seconds):
+    return FrameCache(max_bytes, ttl_seconds)
+
+frame_cache = get_frame_cache(cache_max_mb * 1024 * 1024, cache_ttl)
+
+# Only aggregated or paged rows are read; filters and averages run in the database.
+# Every cached query takes `version`, which changes when an ingest has
+# finished loading, so a complete snapshot invalidates all of them at once.
+@st.cache_data(ttl=version_ttl)
+def ingest_version():
+    return backend.ingest_version(db, source)
+
+version = ingest_version()
+
+@st.cache_data(ttl=cache_ttl, max_entries=cache_max_entries)
+def load_options(column, parent_filters, version):
+    return backend.distinct_values(db, source, column, dict(parent_filters))
+
+@st.cache_data(ttl=cache_ttl, max_entries=cache_max_entries)
+def search_options(column, prefix, version):
+    return backend.search_values(db, source, column, prefix)
 
-@st.cache_data
-def load_data():
-    query = f"SELECT * FROM {mysql_table};"
-    df = pd.read_sql(query, engine)
-    return df
+@st.cache_data(ttl=cache_ttl, max_entries=cache_max_entries)
+def load_count(filters, version):
+    return backend.count_rows(db, source, filters)
 
-df = load_data()
-st.write(f"Total rows loaded: {len(df)}")
+def load_page(filters, page_size, page, version):
+    def query():
+        df = backend.page_rows(db, source, filters, limit=page_size, offset=(page - 1) * page_size)
+        # Only 2 decimals for Unit_price_EUR in the table
+        return compact(df.assign(Unit_price_EUR=df["Unit_price_EUR"].round(2)))
+    return frame_cache.get(frame_cache.make_key("page", filters, page_size, page, version), query)
+
+@st.cache_data(ttl=cache_ttl, max_entries=cache_max_entries)
+def load_average(filters, column, version):
+    return backend.chart_average_price_by(db, source, filters, column)
+
+@st.cache_data(ttl=cache_ttl, max_entries=cache_max_entries)
+def load_part_details(filters, part_number, version):
+    return backend.part_details(db, source, filters, part_number)
+
+@st.cache_data(ttl=cache_ttl, max_entries=cache_max_entries)
+def load_history_count(filters, part_number, resolution, version):
+    return backend.count_price_history(db, source, filters, part_number, resolution)
+
+def load_history(filters, part_number, resolution, limit, offset, version):
+    def query():
+        return compact(backend.price_history(
+            db, source, filters, part_number, resolution=resolution, limit=limit, offset=offset
+        ))
+    key = frame_cache.make_key("history", filters, part_number, resolution, limit, offset, version)
+    return frame_cache.get(key, query)
+
+st.write(f"Total rows in database: {load_count({}, version)}")
 
 #######################################
 # EXTRA STEP: CREATE DISTRIBUTOR COLOR MAP
@@ -48,95 +137,50 @@ def create_distributor_color_map(dataframe):
 # We'll create the map after we apply filters (so we only color
 # for distributors that appear in the filtered data). That ensures
 # we don't define colors for unused distributors if you prefer.
-# Alternatively, define it once with df (unfiltered).
+# Alternatively, define it once for all distributors.
 
 # 4. Sidebar Filters
 st.sidebar.header("Apply Filters")
-all_categories = sorted(df["Categories"].dropna().unique().tolist())
-selected_categories = st.sidebar.multiselect("Categories", all_categories, default=[])
-
-all_subcat = sorted(df["Sub_Categories"].dropna().unique().tolist())
-selected_subcat = st.sidebar.multiselect("Sub Categories", all_subcat, default=[])
-
-all_subcat2 = sorted(df["Sub_Categories2"].dropna().unique().tolist())
-selected_subcat2 = st.sidebar.multiselect("Sub Categories 2", all_subcat2, default=[])
-
-all_parts = sorted(df["Part_Number"].dropna().unique().tolist())
-selected_parts = st.sidebar.multiselect("Part Number", all_parts, default=[])
-
-all_manufacturers = sorted(df["Manufacturer"].dropna().unique().tolist())
-selected_manufacturers = st.sidebar.multiselect("Manufacturer", all_manufacturers, default=[])
-
-all_distributors = sorted(df["Distributor_name"].dropna().unique().tolist())
-selected_distributors = st.sidebar.multiselect("Distributor Name", all_distributors, default=[])
-
-all_regions = sorted(df["Distributor_region"].dropna().unique().tolist())
-selected_regions = st.sidebar.multiselect("Distributor Region", all_regions, default=[])
-
-all_countries = sorted(df["Distributor_country"].dropna().unique().tolist())
-selected_countries = st.sidebar.multiselect("Distributor Country", all_countries, default=[])
-
-all_qty = sorted(df["Unit_break_QTY"].dropna().unique().tolist())
-selected_qty = st.sidebar.multiselect("Unit Break QTY", all_qty, default=[])
-
-# 5. Apply Filters
-filtered_df = df.copy()
-if selected_categories:
-    filtered_df = filtered_df[filtered_df["Categories"].isin(selected_categories)]
-if selected_subcat:
-    filtered_df = filtered_df[filtered_df["Sub_Categories"].isin(selected_subcat)]
-if selected_subcat2:
-    filtered_df = filtered_df[filtered_df["Sub_Categories2"].isin(selected_subcat2)]
-if selected_parts:
-    filtered_df = filtered_df[filtered_df["Part_Number"].isin(selected_parts)]
-if selected_manufacturers:
-    filtered_df = filtered_df[filtered_df["Manufacturer"].isin(selected_manufacturers)]
-if selected_distributors:
-    filtered_df = filtered_df[filtered_df["Distributor_name"].isin(selected_distributors)]
-if selected_regions:
-    filtered_df = filtered_df[filtered_df["Distributor_region"].isin(selected_regions)]
-if selected_countries:
-    filtered_df = filtered_df[filtered_df["Distributor_country"].isin(selected_countries)]
-if selected_qty:
-    filtered_df = filtered_df[filtered_df["Unit_break_QTY"].isin(selected_qty)]
-
+filters = {}
+for label, column in FILTER_COLUMNS.items():
+    selected = st.session_state.get(column, [])
+    if column in SEARCH_COLUMNS:
+        # Type-ahead: only values matching the typed prefix are offered
+        prefix = st.sidebar.text_input(f"Search {label}", key=f"{column}_search").strip()
+        options = search_options(column, prefix, version) if prefix else []
+        options = sorted(set(options) | set(selected))
+    else:
+        parents = tuple((p, tuple(filters[p])) for p in FILTER_PARENTS.get(column, []) if filters[p])
+        options = load_options(column, parents, version)
+        # Drop selections that are no longer offered after a parent changed
+        st.session_state[column] = [value for value in selected if value in options]
+    filters[column] = st.sidebar.multiselect(label, options, key=column)
+selected_parts = filters["Part_Number"]
+
+# 5. Apply Filters (as a parameterized WHERE clause)
 st.subheader("Filtered Results")
-st.write(f"Rows after filtering: {len(filtered_df)}")
-
-# Show only 2 decimals for Unit_price_EUR in the table
-display_cols = [
-    "Categories",
-    "Sub_Categories",
-    "Sub_Categories2",
-    "Part_Number",
-    "Manufacturer",
-    "Distributor_name",
-    "Distributor_region",
-    "Distributor_country",
-    "Unit_break_QTY",
-    "Unit_price_EUR",
-    "New_Lead_Time",
-    "DataPulledTime",
-    "Quantity_in_stock",
-    "Factory_stock_quantity",
-    "On_order_quantity",
-    "Partner_stock_quantity",
-]
-
-df_to_show = filtered_df[display_cols].copy()
-df_to_show["Unit_price_EUR"] = df_to_show["Unit_price_EUR"].round(2)
-st.dataframe(df_to_show)
+filtered_count = load_count(filters, version)
+st.write(f"Rows after filtering: {filtered_count}")
+
+# Show one page at a time
+page_size = st.selectbox("Rows per page", [100, 500, 1000, 5000], index=1)
+page_count = max(1, -(-filtered_count // page_size))
+page = st.number_input("Page", min_value=1, max_value=page_count, value=1, step=1)
+
+st.dataframe(load_page(filters, page_size, page, version))
+st.caption(f"Page {page} of {page_count}")
 
 #######################################
 # CREATE DISTRIBUTOR COLOR MAP (Filtered)
 #######################################
 # Doing this AFTER applying filters ensures we only map colors
-# for distributors present in filtered_df.
-distributor_color_map = create_distributor_color_map(filtered_df)
+# for distributors present in the filtered data.
+df_dist = load_average(filters, "Distributor_name", version)
+distributor_color_map = create_distributor_color_map(df_dist)
 
 # 6. Graphs with Different Colors
 st.subheader("Manufacturer vs. Unit Price")
-df_man = filtered_df.groupby("Manufacturer", as_index=False)["Unit_price_EUR"].mean()
+df_man = load_average(filters, "Manufacturer", version)
 fig_man = px.bar(
     df_man,
     x="Manufacturer",
@@ -150,7 +194,6 @@ fig_man = px.bar(
 st.plotly_chart(fig_man, use_container_width=True)
 
 st.subheader("Distributor vs. Unit Price")
-df_dist = filtered_df.groupby("Distributor_name", as_index=False)["Unit_price_EUR"].mean()
 fig_dist = px.bar(
     df_dist,
     x="Distributor_name",
@@ -162,16 +205,17 @@ fig_dist = px.bar(
 )
 st.plotly_chart(fig_dist, use_container_width=True)
 
-# 7. Single-Part Logic - color by distributor in the line chart
+# 7. Single-Part Logic - price history queried for that part only, downsampled
+#    per day or week in the database when the history is long
 if len(selected_parts) == 1:
     single_part = selected_parts[0]
-    part_data = filtered_df[filtered_df["Part_Number"] == single_part]
+    details = load_part_details(filters, single_part, version)
 
-    if not part_data.empty:
+    if details is not None:
         st.subheader(f"Details for Part Number: {single_part}")
 
-        image_url = part_data["Image_URL"].iloc[0]
-        buy_url = part_data["Buy_now_URL"].iloc[0]
+        image_url = details["Image_URL"]
+        buy_url = details["Buy_now_URL"]
 
         if isinstance(image_url, str) and image_url.lower().startswith("http"):
             st.image(image_url, caption=f"Image for {single_part}", use_column_width=True)
@@ -183,23 +227,51 @@ if len(selected_parts) == 1:
         else:
             st.write("No valid Buy_now_URL found.")
 
-        time_cols = ["DataPulledTime", "Unit_price_EUR", "Distributor_name"]
-        time_df = part_data[time_cols].sort_values("DataPulledTime")
+        resolutions = {"Auto": None, "Raw": "raw", "Daily": "day", "Weekly": "week"}
+        resolution = resolutions[st.selectbox("Price history resolution", list(resolutions))]
+        if resolution is None:
+            for resolution in ("raw", "day", "week"):
+                if load_history_count(filters, single_part, resolution, version) <= history_max_points:
+                    break
+        point_count = load_history_count(filters, single_part, resolution, version)
+
+        # Newest points first; the chart shows at most history_max_points of them
+        time_df = load_history(filters, single_part, resolution, history_max_points, 0, version)
 
         if len(time_df) > 1:
             st.subheader("Unit Price Over Time (Filtered)")
 
+            hover_data = ["Distributor_name"]
+            title = "Unit_price_EUR Over Time"
+            if resolution != "raw":
+                hover_data += ["Price_Min", "Price_Max", "Observations"]
+                title = f"Mean Unit_price_EUR per {resolution} (min/max on hover)"
             price_fig = px.line(
-                time_df,
+                time_df.sort_values("DataPulledTime"),
                 x="DataPulledTime",
                 y="Unit_price_EUR",
                 color="Distributor_name",
                 markers=True,
-                title="Unit_price_EUR Over Time",
-                hover_data=["Distributor_name"],
+                title=title,
+                hover_data=hover_data,
                 color_discrete_map=distributor_color_map,  # same color map
             )
             st.plotly_chart(price_fig, use_container_width=True)
+            if point_count > len(time_df):
+                st.caption(
+                    f"Newest {len(time_df)} of {point_count} points; pick a coarser resolution for the full range."
+                )
+
+        # The points themselves, one page at a time
+        history_page_size = 500
+        history_pages = max(1, -(-point_count // history_page_size))
+        history_page = st.number_input(
+            "Price history page", min_value=1, max_value=history_pages, value=1, step=1
+        )
+        st.dataframe(load_history(
+            filters, single_part, resolution, history_page_size, (history_page - 1) * history_page_size, version
+        ))
+        st.caption(f"Page {history_page} of {history_pages}")
 
 else:
     st.write("Select exactly one Part_Number to see image, buy link, and price over time below.")
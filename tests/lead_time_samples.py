@@ -0,0 +1,35 @@
+"""
+Lead-time sample values and frames shared by tests/test_lead_time.py and
+benchmarks/bench_lead_time.py.
+"""
+import itertools
+
+import numpy as np
+import pandas as pd
+
+# Values seen in the API plus edge cases; "nan"/"none" are what astype(str)
+# makes of missing values
+LEAD_TIMES = [
+    "unknown", "", "  ", "nan", "none", "n/a", "4", "12", "007", "4 weeks", "10 days",
+    "2-3 weeks", "3 to 5 days", "week", "days", "approx 6wk", "1 week 2 days", "14days",
+    "weeks 3", "lt: 21", "٣ weeks",
+]
+WEEKS = ["unknown", "", "nan", "n/a", "0", "4", "12", "4 weeks", "6.5", "none"]
+FORMATS = ["unknown", "weeks", "days", "", "nan", "months", "n/a"]
+
+
+def branch_frame():
+    """
+    Every combination of the sample values, so each branch is exercised.
+    """
+    rows = list(itertools.product(LEAD_TIMES, WEEKS, FORMATS))
+    return pd.DataFrame(rows, columns=["Lead_time", "Lead_time_weeks", "Lead_time_format"])
+
+
+def random_frame(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "Lead_time": rng.choice(LEAD_TIMES, rows),
+        "Lead_time_weeks": rng.choice(WEEKS, rows),
+        "Lead_time_format": rng.choice(FORMATS, rows),
+    })
@@ -0,0 +1,40 @@
+"""
+option_rows() gives the same keys for a batch and for the values read back from SQL.
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from filter_options import option_rows
+
+
+def test_batch_and_sql_values_get_the_same_keys():
+    # A cleaned batch: float price breaks with NaN, NaN text
+    batch = pd.DataFrame({
+        "Categories": ["Passive", "Passive", np.nan],
+        "Sub_Categories": ["Resistors", "Capacitors", "Resistors"],
+        "Unit_break_QTY": [1.0, 10.0, np.nan],
+    })
+    # The same values as SELECT DISTINCT returns them: ints and None
+    from_sql = pd.DataFrame({
+        "Categories": ["Passive", "Passive", None],
+        "Sub_Categories": ["Resistors", "Capacitors", "Resistors"],
+        "Unit_break_QTY": pd.Series([1, 10, None], dtype=object),
+    })
+    assert set(option_rows(batch)["Option_Key"]) == set(option_rows(from_sql)["Option_Key"])
+
+
+def test_sub_categories_are_stored_per_parent():
+    rows = option_rows(pd.DataFrame({
+        "Categories": ["A", "B", "A"],
+        "Sub_Categories": ["X", "X", "X"],
+    }))
+    subs = rows[rows["Column_Name"] == "Sub_Categories"]
+    assert sorted(subs["Categories"]) == ["A", "B"]
+    assert subs["Value"].tolist() == ["X", "X"]
+    assert rows["Option_Key"].is_unique
@@ -0,0 +1,50 @@
+"""
+The dashboard's FrameCache stays under its byte budget and expires entries.
+"""
+import os
+import sys
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "streamlit_app"))
+
+from frame_cache import FrameCache, result_size
+
+
+def frame(rows):
+    return pd.DataFrame({"Description": [f"part {i} " * 10 for i in range(rows)], "Unit_price_EUR": 1.0})
+
+
+def test_evicts_least_recently_used_over_budget():
+    size = result_size(frame(100))
+    cache = FrameCache(max_bytes=int(size * 2.5), ttl_seconds=3600)
+    cache.get("a", lambda: frame(100))
+    cache.get("b", lambda: frame(100))
+    cache.get("a", lambda: frame(100))
+    cache.get("c", lambda: frame(100))
+
+    assert cache.bytes <= cache.max_bytes
+    assert cache.summary()["entries"] == 2
+    # "b" was the least recently used, so it is recomputed
+    calls = []
+    cache.get("b", lambda: calls.append("b") or frame(100))
+    cache.get("c", lambda: calls.append("c") or frame(100))
+    assert calls == ["b"]
+
+
+def test_result_larger_than_budget_is_not_kept():
+    cache = FrameCache(max_bytes=1000, ttl_seconds=3600)
+    assert len(cache.get("big", lambda: frame(1000))) == 1000
+    assert cache.summary() == {"entries": 0, "bytes": 0, "hits": 0, "misses": 1}
+
+
+def test_expired_entry_is_recomputed():
+    cache = FrameCache(max_bytes=10 ** 9, ttl_seconds=0)
+    first = cache.get("a", lambda: frame(10))
+    assert cache.get("a", lambda: frame(10)) is not first
+    assert cache.summary()["misses"] == 2
+
+
+def test_keys_do_not_depend_on_dict_order():
+    assert FrameCache.make_key({"a": [1], "b": [2]}, 3) == FrameCache.make_key({"b": [2], "a": [1]}, 3)
@@ -0,0 +1,35 @@
+"""
+compute_new_lead_time() must give exactly what the row-wise
+calculate_new_lead_time() gives, on every branch and on a random mix.
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lead_time import calculate_new_lead_time, compute_new_lead_time
+from lead_time_samples import branch_frame, random_frame
+
+
+def assert_equivalent(df):
+    expected = df.apply(calculate_new_lead_time, axis=1).astype("int64")
+    actual = compute_new_lead_time(df)
+    mismatches = df[expected.to_numpy() != actual.to_numpy()]
+    assert mismatches.empty, f"{len(mismatches)} rows differ:\n{mismatches.head(20)}"
+
+
+def test_all_branches():
+    assert_equivalent(branch_frame())
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_random_mix(seed):
+    assert_equivalent(random_frame(5_000, seed=seed))
+
+
+def test_keeps_index():
+    df = random_frame(100, seed=3)
+    df.index = df.index + 1000
+    assert compute_new_lead_time(df).index.equals(df.index)